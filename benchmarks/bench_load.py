@@ -0,0 +1,315 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+#
+# Load benchmark of the whole plugin: a chat stream is replayed through onSay and the
+# commands against a local fake translation service (see fakeserver.py), reporting the
+# throughput, the tail latency and the memory used. B3 must be importable.
+#
+# USAGE: python benchmarks/bench_load.py [--chat chat.txt] [--messages 5000] [--workers 4] [--latency 0.05]
+#
+# The chat file holds one message per line; a built-in multilingual sample is used by default.
+
+import argparse
+import gc
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+from textwrap import dedent
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extplugins'))
+
+from fakeserver import FakeTranslateServer
+
+from translator import TranslatorPlugin
+from translator.backends import GoogleBackend
+from translator.httpclient import HttpClient
+from translator.metrics import Histogram
+from translator.metrics import OUTCOMES
+
+try:
+    import resource
+except ImportError:
+    # not available on windows
+    resource = None
+
+
+SAMPLE_CHAT = [
+    'ciao a tutti, come va?',
+    'qualcuno ha visto il cecchino?',
+    'bonjour tout le monde',
+    'ou est le drapeau ennemi?',
+    'hola, alguien quiere jugar en equipo?',
+    'cuidado con la granada',
+    'wie geht es euch heute?',
+    'wo ist die flagge?',
+    'ola pessoal, vamos ganhar essa',
+    'nice shot man, where did you learn that?',
+    'gg wp everyone',
+    'lol',
+    'qualcuno mi copre mentre prendo la bandiera?',
+    'attention derriere toi',
+    'necesitamos un medico aqui',
+    'die andere mannschaft campt schon wieder',
+    'vamos rapido, eles estao na base',
+    'ho lag oggi, scusate',
+    '!help',
+    'haha xD',
+]
+
+COMMANDS = ['!translate %s', '!translate en %s', '!translate it %s', '!translast']
+
+
+def percentiles(histogram):
+    return 'p50 %(p50)7.1fms  p95 %(p95)7.1fms  p99 %(p99)7.1fms  max %(max)7.1fms' % histogram.summary()
+
+
+def max_rss():
+    """
+    Return the peak resident memory of the process in kilobytes, or None if unknown.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes, mac os x bytes
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def chat_stream(args):
+    """
+    Yield the chat messages to replay: a fraction of them is made unique to miss the cache.
+    """
+    if args.chat:
+        with open(args.chat) as f:
+            lines = [line.strip() for line in f if line.strip()]
+    else:
+        lines = SAMPLE_CHAT
+    rand = random.Random(args.seed)
+    for i in range(args.messages):
+        line = rand.choice(lines)
+        if rand.random() < args.unique:
+            line = '%s %s' % (line, i)
+        yield line
+
+
+def create_plugin(args, server):
+    """
+    Start the plugin in a fake B3 console with the google backend pointed to the fake server.
+    """
+    from b3.config import CfgConfigParser
+    from b3.config import XmlConfigParser
+    from b3.fake import FakeClient
+    from b3.fake import FakeConsole
+    from b3.plugins.admin import AdminPlugin
+
+    parser_conf = XmlConfigParser()
+    parser_conf.loadFromString(r"""<configuration/>""")
+    console = FakeConsole(parser_conf)
+    admin = AdminPlugin(console, '@b3/conf/plugin_admin.ini')
+    admin._commands = {}
+    admin.onStartup()
+    console.getPlugin = lambda name: admin if name == 'admin' else None
+    # the fake console prints whatever is said
+    console.say = lambda msg: None
+
+    settings = vars(args).copy()
+    settings['limits'] = '' if args.ratelimit else 'min_time_between: 0\n' \
+                                                   'ratelimit_global: 0\n' \
+                                                   'ratelimit_command: 0\n' \
+                                                   'ratelimit_client: 0\n'
+    conf = CfgConfigParser()
+    conf.loadFromString(dedent("""
+        [settings]
+        default_source_language: auto
+        default_target_language: en
+        display_translator_name: no
+        min_sentence_length: 6
+        exclude_language:
+        worker_count: %(workers)s
+        worker_queue_size: %(queue_size)s
+        batch_size: %(batch_size)s
+        cache_max_entries: %(cache_entries)s
+        request_timeout: 10
+        phrase_file:
+        %(limits)s
+        [commands]
+        translate: guest
+        translast: guest
+        transauto: guest
+    """) % settings)
+
+    plugin = TranslatorPlugin(console, conf)
+    plugin.onLoadConfig()
+    plugin.onStartup()
+    for backend, _ in plugin.backend.backends:
+        if isinstance(backend, GoogleBackend):
+            backend.http.close()
+            backend.http = HttpClient('127.0.0.1', server.port, secure=False, pool_size=max(2, args.workers))
+
+    clients = []
+    for i in range(args.players):
+        client = FakeClient(console=console, name='Player%s' % i, guid='playerguid%s' % i, groupBits=1)
+        client.connects(str(i + 1))
+        # the fake clients keep every message they receive
+        client.message = lambda msg: None
+        clients.append(client)
+    for client in clients[:args.subscribers]:
+        client.says('!transauto on %s' % random.Random(client.cid).choice(['en', 'it', 'fr']))
+    return plugin, clients
+
+
+class DeliveryTracker(object):
+    """
+    Measure the time between the submission of a translation to the worker pool and its delivery.
+    """
+    def __init__(self, pool):
+        self.latency = Histogram(window=1000000)
+        self.submitted = 0
+        self._lock = threading.Lock()
+        self._pool = pool
+        self._submit = pool.submit
+        pool.submit = self.submit
+
+    def submit(self, func, args=(), callback=None, priority=0, deadline=None):
+        start = time.time()
+
+        def deliver(result):
+            elapsed = (time.time() - start) * 1000.0
+            with self._lock:
+                self.latency.add(elapsed)
+            if callback:
+                callback(result)
+
+        self.submitted += 1
+        return self._submit(func, args, deliver, priority, deadline)
+
+    def wait(self, timeout):
+        """
+        Wait for all the submitted translations to be completed or dropped.
+        """
+        deadline = time.time() + timeout
+        while self._pool.completed + self._pool.dropped + self._pool.expired < self.submitted and \
+                time.time() < deadline:
+            time.sleep(0.01)
+
+
+def replay(plugin, clients, args):
+    """
+    Replay the chat stream, mixing in commands: return the time spent handling every event.
+    """
+    rand = random.Random(args.seed)
+    handling = Histogram(window=1000000)
+    for message in chat_stream(args):
+        client = rand.choice(clients)
+        if rand.random() < args.command_rate:
+            command = rand.choice(COMMANDS)
+            message = command % message if '%s' in command else command
+        start = time.time()
+        client.says(message)
+        handling.add((time.time() - start) * 1000.0)
+    return handling
+
+
+def bench_voice(plugin, args):
+    latency = Histogram(window=1000000)
+    for i in range(args.voice):
+        start = time.time()
+        try:
+            plugin.voice(SAMPLE_CHAT[i % len(SAMPLE_CHAT)], 'en')
+        except Exception:
+            pass
+        latency.add((time.time() - start) * 1000.0)
+    return latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Translator plugin load benchmark')
+    parser.add_argument('--chat', help='file holding the chat messages to replay, one per line')
+    parser.add_argument('--messages', type=int, default=5000, help='number of chat events to replay')
+    parser.add_argument('--unique', type=float, default=0.2, help='fraction of messages made unique')
+    parser.add_argument('--command-rate', type=float, default=0.05, help='fraction of events which are commands')
+    parser.add_argument('--players', type=int, default=16)
+    parser.add_argument('--subscribers', type=int, default=4, help='players using !transauto')
+    parser.add_argument('--workers', type=int, default=4, help='plugin worker_count')
+    parser.add_argument('--queue-size', type=int, default=32, help='plugin worker_queue_size')
+    parser.add_argument('--batch-size', type=int, default=1, help='plugin batch_size')
+    parser.add_argument('--cache-entries', type=int, default=1000, help='plugin cache_max_entries')
+    parser.add_argument('--ratelimit', action='store_true', help='keep the default rate limits')
+    parser.add_argument('--voice', type=int, default=0, help='number of text to speech requests')
+    parser.add_argument('--latency', type=float, default=0.05, help='fake service latency, in seconds')
+    parser.add_argument('--jitter', type=float, default=0.02, help='fake service latency deviation, in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 500 replies')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of 429 replies')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # B3 logs everything it does
+    logging.getLogger('output').propagate = False
+    logging.getLogger('output').setLevel(logging.CRITICAL)
+
+    server = FakeTranslateServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                 throttle_rate=args.throttle_rate, seed=args.seed).start()
+    plugin = None
+    try:
+        plugin, clients = create_plugin(args, server)
+        tracker = DeliveryTracker(plugin.pool) if plugin.pool else None
+        gc.collect()
+        rss_before = max_rss()
+
+        start = time.time()
+        handling = replay(plugin, clients, args)
+        if plugin.batcher:
+            plugin.batcher.flush()
+        if tracker:
+            tracker.wait(timeout=60)
+        elapsed = time.time() - start
+        voice = bench_voice(plugin, args) if args.voice else None
+        rss_after = max_rss()
+        stats = plugin.stats()
+    finally:
+        if plugin:
+            plugin.onStop()
+        server.stop()
+
+    print('replayed %s events in %.2fs: %.0f events/s' % (args.messages, elapsed, args.messages / elapsed))
+    print('service requests:   %s' % ', '.join('%s %s' % (k, v) for k, v in sorted(server.requests.items())))
+    print('event handling:     %s' % percentiles(handling))
+    if tracker:
+        print('delivery:           %s (%s translations, %.0f/s)' % (percentiles(tracker.latency), tracker.submitted,
+                                                                     tracker.submitted / elapsed))
+    upstream = stats['histograms'].get('upstream.latency')
+    if upstream:
+        print('upstream:           p50 %(p50)7.1fms  p95 %(p95)7.1fms  p99 %(p99)7.1fms  max %(max)7.1fms' % upstream)
+    if voice:
+        print('text to speech:     %s' % percentiles(voice))
+    print('outcomes:           %s' % ', '.join('%s %s' % (k, stats['counters'].get('requests.%s' % k, 0))
+                                               for k in OUTCOMES))
+    print('cache:              %(entries)s entries, %(bytes)s bytes, %(hits)s hits, %(misses)s misses' % stats['cache'])
+    print('dropped:            %(dropped)s queued, %(expired)s expired, %(batch_dropped)s batched, '
+          '%(output_dropped)s output' % stats['queue'])
+    print('throttled:          %s' % ', '.join('%s %s' % (k, v) for k, v in sorted(stats['throttled'].items())))
+    if rss_after is not None:
+        print('memory:             %s KB peak RSS (%+d KB during the replay)' % (rss_after, rss_after - rss_before))
+
+
+if __name__ == '__main__':
+    main()
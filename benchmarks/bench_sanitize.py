@@ -0,0 +1,66 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+#
+# Micro-benchmark of the translated message sanitizer: compares the single pass
+# Sanitizer with the former chain of re.sub() and str.replace() calls.
+#
+# USAGE: python benchmarks/bench_sanitize.py [iterations]
+
+import imp
+import os
+import re
+import sys
+import timeit
+
+sanitizer = imp.load_source('sanitizer', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                      '..', 'extplugins', 'translator', 'sanitizer.py'))
+
+
+def legacy_sanitize(s):
+    return re.sub('\^[0-9]', '', re.sub(r'<[^>]*>', '', s)).replace('ß', 'ss').replace('ü', 'ue').\
+           replace('ö', 'oe').replace('ä', 'ae').replace('à', 'a').replace('è', 'e').replace('é', 'e').\
+           replace('ì', 'i').replace('ò', 'o').replace('ù', 'u').replace('ç', 'c').replace('€', 'euro').\
+           replace('$', 'dollar').replace('£', 'pound').replace('%', 'pc').replace('"', "''").strip()
+
+
+SAMPLES = [
+    u'Ciao a tutti, come va?: Hello everyone, how are you?\n',
+    u'^1Grüße aus München: Greetings from <b>Munich</b>, 100% "ß" für 5€\n\nnoun\ngreeting: Gruß, Begrüßung\n',
+    u'ça va très bien: it is going very well\n\nadverb\nvery: très, fort, bien\nwell: bien, très\n',
+]
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    single_pass = sanitizer.Sanitizer()
+    for sample in SAMPLES:
+        assert legacy_sanitize(sample) == single_pass(sample)
+
+    legacy = min(timeit.repeat(lambda: [legacy_sanitize(x) for x in SAMPLES], number=iterations, repeat=3))
+    current = min(timeit.repeat(lambda: [single_pass(x) for x in SAMPLES], number=iterations, repeat=3))
+    calls = iterations * len(SAMPLES)
+    print('legacy sanitizer:      %.2f us/call' % (legacy / calls * 1e6))
+    print('single pass sanitizer: %.2f us/call' % (current / calls * 1e6))
+    print('speedup:               %.2fx' % (legacy / current))
+
+
+if __name__ == '__main__':
+    reload(sys)
+    sys.setdefaultencoding('utf-8')
+    main()
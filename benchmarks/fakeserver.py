@@ -0,0 +1,204 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+#
+# Local stand-in for the Google Translate web API, used by the load benchmark.
+# It serves /translate_a/single (dj=1 json replies) and /translate_tts (fake mp3 data)
+# with a configurable latency, error rate and rate of 429 replies.
+#
+# USAGE: python benchmarks/fakeserver.py [--port 8080] [--latency 0.2] [--error-rate 0.01] [--throttle-rate 0.01]
+
+from __future__ import print_function
+
+import argparse
+import json
+import random
+import threading
+import time
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from BaseHTTPServer import HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs
+    from urlparse import urlparse
+except ImportError:
+    from http.server import BaseHTTPRequestHandler
+    from http.server import HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs
+    from urllib.parse import urlparse
+
+# python 2 doesn't know the reason phrase of 429
+REASONS = {429: 'Too Many Requests', 500: 'Internal Server Error', 404: 'Not Found'}
+
+
+def fake_translation(text, lang):
+    """
+    Return a recognizable translation of a single line.
+    """
+    return u'[%s] %s' % (lang, text)
+
+
+def translate_reply(text, lang, dictionary=False):
+    """
+    Build a dj=1 reply: one sentence per line of text, plus a dictionary entry for single words.
+    """
+    lines = text.split(u'\n')
+    sentences = []
+    for i, line in enumerate(lines):
+        end = u'\n' if i < len(lines) - 1 else u''
+        sentences.append({'trans': fake_translation(line, lang) + end, 'orig': line + end, 'backend': 1})
+    reply = {'sentences': sentences, 'src': 'auto'}
+    if dictionary and len(text.split()) == 1:
+        reply['dict'] = [{'pos': 'noun', 'terms': [fake_translation(text, lang)],
+                          'entry': [{'word': fake_translation(text, lang), 'reverse_translation': [text], 'score': 1.0}]}]
+    return json.dumps(reply).encode('utf-8')
+
+
+class FakeTranslateHandler(BaseHTTPRequestHandler):
+
+    # keep the connections alive like the real service does
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        time.sleep(server.delay())
+
+        status = server.fault()
+        if status:
+            self.reply(status, b'error', 'text/plain')
+            return
+
+        text = query.get('q', [''])[0]
+        if not isinstance(text, type(u'')):
+            text = text.decode('utf-8')
+        if url.path == '/translate_a/single':
+            server.count('translate')
+            lang = query.get('tl', ['en'])[0]
+            self.reply(200, translate_reply(text, lang, 'bd' in query.get('dt', [])), 'application/json; charset=utf-8')
+        elif url.path == '/translate_tts':
+            server.count('tts')
+            # about the size of a real mp3 pronunciation
+            self.reply(200, b'ID3' + b'\x00' * (server.voice_bytes * max(1, len(text))), 'audio/mpeg')
+        else:
+            self.reply(404, b'not found', 'text/plain')
+
+    def reply(self, status, body, content_type):
+        self.send_response(status, REASONS.get(status))
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeTranslateServer(ThreadingMixIn, HTTPServer):
+    """
+    Threaded HTTP server imitating the translation service.
+    """
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0, voice_bytes=256, seed=None):
+        """
+        :param port: The port to listen on (0 to pick a free one)
+        :param latency: The average time taken to reply, in seconds
+        :param jitter: The maximum random deviation from the average latency, in seconds
+        :param error_rate: The fraction of requests answered with a 500 error
+        :param throttle_rate: The fraction of requests answered with a 429 error
+        :param voice_bytes: The size of the pronunciation of a single character, in bytes
+        :param seed: The seed of the random generator, for repeatable runs
+        """
+        HTTPServer.__init__(self, ('127.0.0.1', port), FakeTranslateHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.voice_bytes = voice_bytes
+        self.requests = {'translate': 0, 'tts': 0, 'error': 0, 'throttled': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def delay(self):
+        with self._lock:
+            return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def fault(self):
+        """
+        Return the error status of the current request, or None if it must succeed.
+        """
+        with self._lock:
+            value = self._random.random()
+            if value < self.throttle_rate:
+                self.requests['throttled'] += 1
+                return 429
+            if value < self.throttle_rate + self.error_rate:
+                self.requests['error'] += 1
+                return 500
+            return None
+
+    def count(self, name):
+        with self._lock:
+            self.requests[name] += 1
+
+    def start(self):
+        """
+        Serve requests in a background thread.
+        """
+        self._thread = threading.Thread(target=self.serve_forever, name='FakeTranslateServer')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Google Translate server')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.2, help='average reply time, in seconds')
+    parser.add_argument('--jitter', type=float, default=0.1, help='maximum latency deviation, in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 500 replies')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of 429 replies')
+    args = parser.parse_args()
+
+    server = FakeTranslateServer(args.port, args.latency, args.jitter, args.error_rate, args.throttle_rate)
+    print('serving on http://127.0.0.1:%s' % server.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print('requests: %s' % server.requests)
+
+
+if __name__ == '__main__':
+    main()
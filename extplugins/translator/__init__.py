@@ -36,36 +36,47 @@ __author__ = 'Fenix'
 __version__ = '3.2'
 
 import b3
+import b3.cron
 import b3.plugin
 import b3.events
 
-# translate utility that utilize google translator, support python2 & python3
-# Note that the order or arguments in the URL matters.
-
-try:
-    from urllib import urlencode
-except ImportError:
-    from urllib.parse import urlencode
-
-try:
-    import urllib2
-except ImportError:
-    import urllib.request as urllib2
-
-try:
-    # only necessary if using exclude_language setting
-    import langdetect
-except ImportError:
-    pass
-
 import json
+import os
 import re
 import sys
+import threading
 import time
 reload(sys)
 sys.setdefaultencoding('utf-8')
 
 from ConfigParser import NoOptionError
+from functools import partial
+from functools import wraps
+from .batch import ChatBatcher
+from .backends import BACKENDS
+from .backends import BackendUnavailable
+from .backends import FailoverBackend
+from .backends import create_backend
+from .cache import TranslationCache
+from .detector import LangDetect
+from .detector import LanguageDetector
+from .history import ChatHistory
+from .metrics import Metrics
+from .metrics import OUTCOMES
+from .metrics import outcome
+from .normalizer import Normalizer
+from .output import MessagePacer
+from .output import split_message
+from .phrasebook import PhraseBook
+from .pool import WorkerPool
+from .prefilter import SkipFilter
+from .prefilter import is_chat
+from .ratelimit import RateLimiter
+from .ratelimit import Refund
+from .sanitizer import Sanitizer
+from .singleflight import SingleFlight
+from .store import TranslationStore
+from .voicecache import VoiceCache
 #from urllib2 import urlopen
 #from urllib2 import Request
 #from urllib2 import URLError
@@ -83,12 +94,41 @@ except ImportError:
         return None
 
 
+def timed(func):
+    """
+    Record the time spent in a plugin startup method (in milliseconds) in the plugin metrics
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        start = time.time()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            elapsed = (time.time() - start) * 1000
+            # looked up after the call: the plugin metrics are created by onLoadConfig
+            self.metrics.observe('startup.%s' % func.__name__, elapsed)
+            self.debug('%s completed in %.1fms' % (func.__name__, elapsed))
+    return wrapper
+
+
 class TranslatorPlugin(b3.plugin.Plugin):
     
     adminPlugin = None
     cmdPrefix = None
-
-    lastTime = None
+    pool = None
+    batcher = None
+    backend = None
+    cache = TranslationCache(max_entries=0)
+    voices = VoiceCache(max_bytes=0)
+    store = None
+    storeCrontabs = []
+    statsCrontab = None
+
+    ratelimiter = RateLimiter()
+    # queue priority of the translations (lower first): players waiting for a command go first
+    priorities = {'command': 0, 'auto': 1}
+    sanitizer = Sanitizer()
+    transauto = {}
 
     # configuration values
     settings = {
@@ -101,9 +141,61 @@ class TranslatorPlugin(b3.plugin.Plugin):
         'always_loud': False,
         'max_history': 10,
         'exclude_language': 'en',
+        'worker_count': 0,
+        'worker_queue_size': 32,
+        'worker_queue_policy': 'drop_new',
+        'auto_max_age': 10.0,
+        'request_timeout': 5.0,
+        'connect_timeout': 3.0,
+        'http_pool_size': 2,
+        'max_response_size': 131072,
+        'backend': 'google',
+        'secondary_backend': '',
+        'breaker_failures': 5,
+        'breaker_latency': 0.0,
+        'breaker_backoff': 30.0,
+        'breaker_max_backoff': 600.0,
+        'backend_url': 'http://127.0.0.1:5000',
+        'backend_api_key': '',
+        'phrase_file': os.path.join(os.path.dirname(__file__), 'conf', 'phrases.ini'),
+        'cache_max_entries': 1000,
+        'cache_max_bytes': 262144,
+        'cache_ttl': 86400,
+        'cache_file': '',
+        'cache_file_batch_size': 20,
+        'cache_file_ttl': 2592000,
+        'cache_file_max_entries': 100000,
+        'voice_cache_max_bytes': 4194304,
+        'voice_cache_dir': '',
+        'voice_cache_dir_max_bytes': 67108864,
+        'batch_size': 1,
+        'batch_max_delay': 2.0,
+        'normalize_rules': 'colors, whitespace, punctuation, elongation, case',
+        'max_line_length': 0,
+        'output_rate': 0.0,
+        'output_queue_size': 20,
+        'ratelimit_global': 30,
+        'ratelimit_global_burst': 10,
+        'ratelimit_auto_burst': 1,
+        'ratelimit_command': 20,
+        'ratelimit_command_burst': 5,
+        'ratelimit_client': 6,
+        'ratelimit_client_burst': 3,
+        'stats_file': '',
+        'stats_interval': 5,
     }
 
-    last_message_said = []
+    history = ChatHistory()
+    detector = LanguageDetector()
+    skipfilter = SkipFilter()
+    pacer = MessagePacer()
+    flights = SingleFlight()
+    normalizer = Normalizer()
+    phrasebook = PhraseBook()
+    metrics = Metrics()
+    # number of requests sent to the translation service by the current thread
+    sent = threading.local()
+    line_length = 80
 
     # available languages
     languages = {
@@ -114,10 +206,14 @@ class TranslatorPlugin(b3.plugin.Plugin):
         'sv': 'Swedish', 'th': 'Thai', 'tr': 'Turkish', 'uk': 'Ukrainian', 'ru': 'Russian', 'zh': 'Chinese',
     }
 
+    @timed
     def onLoadConfig(self):
         """
         Load the configuration file
         """
+        # counters and latency histograms reported by !transstats
+        self.metrics = Metrics()
+
         try:
             value = self.config.get('settings', 'default_source_language')
             if value in self.languages.keys() or value == 'auto':
@@ -205,10 +301,173 @@ class TranslatorPlugin(b3.plugin.Plugin):
             self.debug('using default value (%s) for settings/always_loud' %
                        self.settings['always_loud'])
 
+        self.load_setting('max_history', 'getint', minimum=1)
+        self.load_setting('worker_count', 'getint', minimum=0)
+        self.load_setting('worker_queue_size', 'getint', minimum=0)
+        self.load_setting('worker_queue_policy', choices=WorkerPool.POLICIES)
+        self.load_setting('auto_max_age', 'getfloat', minimum=0)
+        self.load_setting('request_timeout', 'getfloat', minimum=0)
+        self.load_setting('connect_timeout', 'getfloat', minimum=0)
+        self.load_setting('http_pool_size', 'getint', minimum=1)
+        self.load_setting('max_response_size', 'getint', minimum=0)
+        self.load_setting('backend', choices=BACKENDS)
+        self.load_setting('secondary_backend', choices=list(BACKENDS) + [''])
+        self.load_setting('breaker_failures', 'getint', minimum=1)
+        self.load_setting('breaker_latency', 'getfloat', minimum=0)
+        self.load_setting('breaker_backoff', 'getfloat', minimum=0)
+        self.load_setting('breaker_max_backoff', 'getfloat', minimum=0)
+        self.load_setting('backend_url')
+        self.load_setting('backend_api_key')
+        self.load_setting('phrase_file')
+        self.load_setting('cache_max_entries', 'getint', minimum=0)
+        self.load_setting('cache_max_bytes', 'getint', minimum=0)
+        self.load_setting('cache_ttl', 'getint', minimum=0)
+
+        self.load_setting('cache_file')
+        self.load_setting('cache_file_batch_size', 'getint', minimum=1)
+        self.load_setting('cache_file_ttl', 'getint', minimum=0)
+        self.load_setting('cache_file_max_entries', 'getint', minimum=0)
+        self.load_setting('voice_cache_max_bytes', 'getint', minimum=0)
+        self.load_setting('voice_cache_dir')
+        self.load_setting('voice_cache_dir_max_bytes', 'getint', minimum=0)
+        self.load_setting('batch_size', 'getint', minimum=1)
+        self.load_setting('batch_max_delay', 'getfloat', minimum=0)
+        self.load_setting('normalize_rules')
+        self.load_setting('max_line_length', 'getint', minimum=0)
+        self.load_setting('output_rate', 'getfloat', minimum=0)
+        self.load_setting('output_queue_size', 'getint', minimum=0)
+        self.load_setting('ratelimit_global', 'getfloat', minimum=0)
+        self.load_setting('ratelimit_global_burst', 'getint', minimum=1)
+        self.load_setting('ratelimit_auto_burst', 'getint', minimum=1)
+        self.load_setting('ratelimit_command', 'getfloat', minimum=0)
+        self.load_setting('ratelimit_command_burst', 'getint', minimum=1)
+        self.load_setting('ratelimit_client', 'getfloat', minimum=0)
+        self.load_setting('ratelimit_client_burst', 'getint', minimum=1)
+        self.load_setting('stats_file')
+        self.load_setting('stats_interval', 'getint', minimum=1)
+
+        # rates are configured in requests per minute: automatic translations keep
+        # honoring min_time_between, which is now the refill period of their bucket
+        min_time_between = self.settings['min_time_between']
+        self.ratelimiter = RateLimiter(global_rate=self.settings['ratelimit_global'] / 60.0,
+                                       global_burst=self.settings['ratelimit_global_burst'],
+                                       client_rate=self.settings['ratelimit_client'] / 60.0,
+                                       client_burst=self.settings['ratelimit_client_burst'],
+                                       auto_rate=1.0 / min_time_between if min_time_between > 0 else 0,
+                                       auto_burst=self.settings['ratelimit_auto_burst'],
+                                       command_rate=self.settings['ratelimit_command'] / 60.0,
+                                       command_burst=self.settings['ratelimit_command_burst'])
+
+        # known phrases are translated locally
+        self.phrasebook = PhraseBook()
+        if self.settings['phrase_file']:
+            try:
+                self.phrasebook.load(b3.getAbsolutePath(self.settings['phrase_file']))
+                self.debug('loaded %s phrases in %s languages' % (len(self.phrasebook),
+                                                                  len(self.phrasebook.languages)))
+            except Exception, e:
+                self.error('could not load phrase file %s: %s' % (self.settings['phrase_file'], e))
+
+        if self.backend:
+            self.backend.close()
+
+        backends = []
+        for name in (self.settings['backend'], self.settings['secondary_backend']):
+            if name and name not in [x.name for x in backends]:
+                try:
+                    backends.append(self.create_backend(name))
+                except Exception, e:
+                    self.error('could not create %s translation backend: %s' % (name, e))
+
+        if not backends:
+            self.debug('using default translation backend: google')
+            backends.append(self.create_backend('google'))
+
+        # stop hammering a failing backend and fail over to the next one
+        self.backend = FailoverBackend(backends,
+                                       max_failures=self.settings['breaker_failures'],
+                                       max_latency=self.settings['breaker_latency'],
+                                       backoff=self.settings['breaker_backoff'],
+                                       max_backoff=self.settings['breaker_max_backoff'])
+        self.backend.on_failure = self.on_backend_failure
+
+        self.cache = TranslationCache(max_entries=self.settings['cache_max_entries'],
+                                      max_bytes=self.settings['cache_max_bytes'],
+                                      ttl=self.settings['cache_ttl'])
+
+        # the audio files are created on first use
+        voice_dir = self.settings['voice_cache_dir']
+        self.voices = VoiceCache(max_bytes=self.settings['voice_cache_max_bytes'],
+                                 path=b3.getAbsolutePath(voice_dir) if voice_dir else None,
+                                 max_disk_bytes=self.settings['voice_cache_dir_max_bytes'])
+
+    def create_backend(self, name):
+        """
+        Create the translation backend with the given name using the plugin settings
+        """
+        backend = create_backend(name,
+                                 url=self.settings['backend_url'],
+                                 api_key=self.settings['backend_api_key'],
+                                 phrasebook=self.phrasebook,
+                                 pool_size=self.settings['http_pool_size'],
+                                 max_response_size=self.settings['max_response_size'],
+                                 connect_timeout=self.settings['connect_timeout'],
+                                 read_timeout=self.settings['request_timeout'])
+        self.debug('using %s translation backend' % name)
+        return backend
+
+    def load_setting(self, name, getter='get', minimum=None, choices=None):
+        """
+        Load a single value from the settings section of the configuration file
+        :param name: The name of the setting
+        :param getter: The name of the config parser method used to read the value
+        :param minimum: The minimum value accepted (numeric settings only)
+        :param choices: A collection of accepted values
+        """
+        try:
+            value = getattr(self.config, getter)('settings', name)
+            if (minimum is not None and value < minimum) or (choices is not None and value not in choices):
+                self.warning('invalid value specified in settings/%s (%s), '
+                             'using default: %s' % (name, value, self.settings[name]))
+            else:
+                self.settings[name] = value
+                self.debug('loaded %s setting: %s' % (name, self.settings[name]))
+        except NoOptionError:
+            self.warning('could not find settings/%s in config file, '
+                         'using default: %s' % (name, self.settings[name]))
+        except ValueError, e:
+            self.error('could not load settings/%s config value: %s' % (name, e))
+            self.debug('using default value (%s) for settings/%s' % (self.settings[name], name))
+
+    @timed
     def onStartup(self):
         """
         Initialize plugin settings
         """
+        # automatic translation subscribers grouped by target language
+        self.transauto = {}
+
+        # identical translations requested at the same time are performed once
+        self.flights = SingleFlight()
+
+        # last chat messages, used by !translast
+        self.history = ChatHistory(self.settings['max_history'])
+
+        # cheap heuristics first, langdetect (if installed) only for the undecided messages:
+        # it's imported when first needed since loading its language profiles is slow
+        self.detector = LanguageDetector(LangDetect())
+
+        # strip color codes and unprintable characters according to the game rules
+        self.sanitizer = Sanitizer.for_game(self.console.gameName)
+
+        # map cosmetic variants of the same chat line to a single translation
+        rules = [x.strip() for x in self.settings['normalize_rules'].split(',') if x.strip()]
+        try:
+            self.normalizer = Normalizer.for_game(self.console.gameName, rules)
+        except ValueError, e:
+            self.warning('invalid value specified in settings/normalize_rules (%s): %s' % (self.settings['normalize_rules'], e))
+            self.normalizer = Normalizer.for_game(self.console.gameName, [x for x in rules if x in Normalizer.RULES])
+
         self.adminPlugin = self.console.getPlugin('admin')
         if not self.adminPlugin:    
             self.error('could not start without admin plugin')
@@ -225,16 +484,20 @@ class TranslatorPlugin(b3.plugin.Plugin):
 
                 func = getCmd(self, cmd)
                 if func: 
-                    self.adminPlugin.registerCommand(self, cmd, level, func, alias)
+                    self.adminPlugin.registerCommand(self, cmd, level, self.timed_command(cmd, func), alias)
 
         try:
             # register the events needed
             self.registerEvent(self.console.getEventID('EVT_CLIENT_SAY'), self.onSay)
             self.registerEvent(self.console.getEventID('EVT_CLIENT_TEAM_SAY'), self.onSay)
+            self.registerEvent(self.console.getEventID('EVT_CLIENT_DISCONNECT'), self.onDisconnect)
+            self.registerEvent(self.console.getEventID('EVT_CLIENT_NAME_CHANGE'), self.onNameChange)
         except TypeError:
             # keep backwards compatibility
             self.registerEvent(self.console.getEventID('EVT_CLIENT_SAY'))
             self.registerEvent(self.console.getEventID('EVT_CLIENT_TEAM_SAY'))
+            self.registerEvent(self.console.getEventID('EVT_CLIENT_DISCONNECT'))
+            self.registerEvent(self.console.getEventID('EVT_CLIENT_NAME_CHANGE'))
 
         try:
             # B3 > 1.10dev
@@ -248,62 +511,190 @@ class TranslatorPlugin(b3.plugin.Plugin):
                               self.adminPlugin.cmdPrefixLoud,
                               self.adminPlugin.cmdPrefixBig)
 
+        # drop the translations which would just echo the message before they reach the network
+        self.skipfilter = SkipFilter(self.detector, self.cmdPrefix + ('/',))
+
+        # long translations are split to fit the game chat and sent at the configured rcon rate
+        self.line_length = self.settings['max_line_length'] or getattr(self.console, '_line_length', 80)
+        self.pacer.stop()
+        self.pacer = MessagePacer(rate=self.settings['output_rate'], queue_size=self.settings['output_queue_size'])
+
+        if self.settings['worker_count'] > 0:
+            # translate in background so we don't hang the event dispatch
+            self.pool = WorkerPool(workers=self.settings['worker_count'],
+                                   queue_size=self.settings['worker_queue_size'],
+                                   policy=self.settings['worker_queue_policy'],
+                                   on_error=self.on_job_error,
+                                   on_callback_error=self.on_callback_error)
+            self.pool.start()
+            self.debug('started %s translation workers' % self.settings['worker_count'])
+
+        if self.settings['batch_size'] > 1:
+            # collect chat lines and translate them together: min_time_between applies to batches
+            self.batcher = ChatBatcher(self.on_chat_batch,
+                                       max_size=self.settings['batch_size'],
+                                       max_delay=self.settings['batch_max_delay'],
+                                       min_interval=self.settings['min_time_between'])
+
+        if self.settings['cache_file']:
+            # the database file is opened on first use
+            self.store = TranslationStore(b3.getAbsolutePath(self.settings['cache_file']),
+                                          batch_size=self.settings['cache_file_batch_size'],
+                                          ttl=self.settings['cache_file_ttl'],
+                                          max_entries=self.settings['cache_file_max_entries'])
+            for crontab in self.storeCrontabs:
+                self.console.cron - crontab
+            # write pending translations every minute and compact the file every hour
+            self.storeCrontabs = [b3.cron.PluginCronTab(self, self.flush_store, second=0, minute='*'),
+                                  b3.cron.PluginCronTab(self, self.compact_store, second=30, minute=0)]
+            for crontab in self.storeCrontabs:
+                self.console.cron + crontab
+            self.debug('persistent translation cache: %s' % self.store.path)
+
+        if self.statsCrontab:
+            self.console.cron - self.statsCrontab
+            self.statsCrontab = None
+        if self.settings['stats_file']:
+            # dump the statistics periodically so they can be collected by external tools
+            self.statsCrontab = b3.cron.PluginCronTab(self, self.write_stats, second=0,
+                                                      minute='*/%s' % self.settings['stats_interval'])
+            self.console.cron + self.statsCrontab
+            self.debug('writing statistics to %s every %s minutes' % (self.settings['stats_file'],
+                                                                      self.settings['stats_interval']))
+
         # notice plugin startup
         self.debug('plugin started')
-        
+
+    def onStop(self):
+        """
+        Stop the translation workers
+        """
+        if self.batcher:
+            self.batcher.cancel()
+
+        if self.pool:
+            self.pool.stop(timeout=self.settings['request_timeout'])
+            self.pool = None
+
+        if self.store:
+            self.store.close()
+
+        if self.backend:
+            self.backend.close()
+
+        self.pacer.stop()
+
+        if self.settings['stats_file']:
+            self.write_stats()
+
     ####################################################################################################################
     ##                                                                                                                ##
     ##   EVENTS                                                                                                       ##
     ##                                                                                                                ##
     ####################################################################################################################
 
-    def format_json(self, result, max_entries=5):
-        if max_entries is None:
-            max_entries = 999999
+    def translate(self, text, from_lang="auto", to_lang="en-EN"):
+        """translate text, looking up the translation cache first"""
+        raw, text = text, self.normalizer.clean(text)
+        # known phrases are answered locally
+        msg = self.phrase_lookup(text, to_lang)
+        if msg:
+            return msg
+
+        key = self.translation_key(text, from_lang, to_lang)
+        msg = self.cache_lookup(key)
+        self.normalizer.account(raw, msg is not None)
+        if msg is not None:
+            return msg
+
+        # wait for the same translation if another thread is already performing it
+        return self.flights.do(key, self.fetch_translation, key, text, from_lang, to_lang)
+
+    def fetch_translation(self, key, text, from_lang="auto", to_lang="en-EN"):
+        """request a translation from the backend and cache it"""
+        msg = self.request_translation(text, from_lang, to_lang)
+        if msg:
+            self.cache_store(key, msg)
+        return msg
 
-        ret = []
-        for sentence in result['sentences']:
-            ret.append(sentence['orig'] + ': ' + sentence['trans'])
-            ret.append('')
+    def translate_batch(self, texts, from_lang="auto", to_lang="en-EN"):
+        """translate a list of lines with a single request, return the list of translations"""
+        cleaned = [self.normalizer.clean(text) for text in texts]
+        keys = [self.translation_key(text, from_lang, to_lang) for text in cleaned]
+        results = [self.phrase_lookup(text, to_lang) for text in cleaned]
+        missing = []
+        for i, (raw, text, key) in enumerate(zip(texts, cleaned, keys)):
+            if results[i] is None:
+                results[i] = self.cache_lookup(key)
+                self.normalizer.account(raw, results[i] is not None)
+            if results[i] is None and key not in dict(missing):
+                missing.append((key, text))
+
+        if not missing:
+            return results
+
+        if len(missing) == 1:
+            translated = dict((key, self.request_translation(text, from_lang, to_lang)) for key, text in missing)
+        else:
+            self.debug('attempting to translate %s messages -> %s' % (len(missing), to_lang))
+            lines = self.request_backend('translate_batch', [text for _, text in missing], from_lang, to_lang)
+            if lines is not None:
+                translated = {}
+                for (key, text), line in zip(missing, lines):
+                    line = line.strip()
+                    translated[key] = self.str_sanitize('%s: %s' % (text, line)) if line else None
+            else:
+                # the backend could not translate the lines together: translate them one by one
+                self.debug('could not translate batch of %s messages: translating one by one' % len(missing))
+                translated = dict((key, self.request_translation(text, from_lang, to_lang)) for key, text in missing)
+
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                results[i] = translated.get(key)
+                if results[i]:
+                    self.cache_store(key, results[i])
+
+        return results
+
+    def phrase_lookup(self, text, to_lang="en-EN"):
+        """translate a known phrase without using the translation service"""
+        translation = self.phrasebook.lookup(text, to_lang.split('-')[0])
+        return self.str_sanitize('%s: %s' % (text, translation)) if translation else None
+
+    def translation_key(self, text, from_lang="auto", to_lang="en-EN"):
+        """build the key identifying the translation of text, after normalization"""
+        return self.normalizer.key(text), from_lang, to_lang
+
+    def cache_lookup(self, key):
+        """return the cached translation for key (in memory or on disk), or None"""
+        msg = self.cache.get(key)
+        if msg is not None:
+            self.verbose('translation cache hit [ source <%s> : %s | result <%s> : %s ]' % (key[1], key[0], key[2], msg))
+            return msg
+
+        if self.store:
+            msg = self.store.get(key)
+            if msg is not None:
+                self.verbose('persistent cache hit [ source <%s> : %s | result <%s> : %s ]' % (key[1], key[0], key[2], msg))
+                self.cache.put(key, msg)
+                return msg
 
-        # format pos
-        if 'dict' in result:
-            for pos in result['dict']:
-                ret.append(pos['pos'])
-                for entry in pos['entry'][:max_entries]:
-                    ret.append(entry['word'] + ': ' + ', '.join(entry['reverse_translation']))
-                ret.append('')
+        return None
 
-        return '\n'.join(ret)
+    def cache_store(self, key, msg):
+        """store a translation in the caches"""
+        self.cache.put(key, msg)
+        if self.store:
+            self.store.put(key, msg)
 
-    def translate(self, text, from_lang="auto", to_lang="en-EN"):
-        """translate text, return the result as json"""
+    def request_translation(self, text, from_lang="auto", to_lang="en-EN"):
+        """translate text using the configured translation backend"""
         self.debug('attempting to translate message -> %s : %s' % (to_lang, text))
-
-        url = 'https://translate.googleapis.com/translate_a/single?'
-
-        params = []
-        params.append('client=gtx')
-        params.append('sl=' + from_lang)
-        params.append('tl=' + to_lang)
-        params.append('hl=en-US')
-        params.append('dt=t')
-        params.append('dt=bd')
-        params.append('dj=1')
-        params.append('source=input')
-        params.append(urlencode({'q': text}))
-        url += '&'.join(params)
-
-        request = urllib2.Request(url)
-        browser = "Mozilla/5.0 (X11; Linux x86_64; rv:45.0) Gecko/20100101 Firefox/45.0"
-        request.add_header('User-Agent', browser)
-        response = urllib2.urlopen(request)
-        rtn = json.loads(response.read().decode('utf8'))
+        msg = self.request_backend('translate', text, from_lang, to_lang)
         self.verbose('translation done and received, sanitizing...')
 
         # formatting the string
-        msg = self.format_json(rtn)
-        msg = self.str_sanitize(msg)
+        msg = self.str_sanitize(msg) if msg else None
         if not msg:
             self.debug('could not translate message (%s): empty string returned' % text)
             return None
@@ -312,21 +703,29 @@ class TranslatorPlugin(b3.plugin.Plugin):
         self.verbose('message translated [ source <%s> : %s | result <%s> : %s ]' % (from_lang, text, to_lang, msg))
         return msg
 
+    def request_backend(self, method, *args):
+        """invoke a translation backend method recording its latency and outcome"""
+        self.sent.count = self.requests_sent() + 1
+        start = time.time()
+        try:
+            result = getattr(self.backend, method)(*args)
+        except Exception, e:
+            self.metrics.incr('requests.%s' % outcome(e))
+            raise
+        else:
+            self.metrics.incr('requests.%s' % outcome(result=result))
+            return result
+        finally:
+            # failures included: timeouts are the tail of the latency distribution
+            self.metrics.observe('upstream.latency', (time.time() - start) * 1000.0)
+
+    def requests_sent(self):
+        """return the number of requests sent to the translation service by the current thread"""
+        return getattr(self.sent, 'count', 0)
+
     def voice(self, text, lang='en'):
         """return the sound of an word, in mp3 bytes"""
-        url = 'https://translate.googleapis.com/translate_tts?'
-
-        params = []
-        params.append('client=gtx')
-        params.append('ie=UTF-8')
-        params.append('tl=' + lang)
-        params.append(urlencode({'q': text}))
-        url += '&'.join(params)
-        request = urllib2.Request(url)
-        browser = "Mozilla/5.0 (X11; Linux x86_64; rv:45.0) Gecko/20100101 Firefox/45.0"
-        request.add_header('User-Agent', browser)
-        response = urllib2.urlopen(request)
-        return response.read()
+        return self.voices.get(text, lang, self.backend.voice)
 
     def onEvent(self, event):
         """
@@ -335,6 +734,25 @@ class TranslatorPlugin(b3.plugin.Plugin):
         if event.type == self.console.getEventID('EVT_CLIENT_SAY') or \
             event.type == self.console.getEventID('EVT_CLIENT_TEAM_SAY'):
             self.onSay(event)
+        elif event.type == self.console.getEventID('EVT_CLIENT_DISCONNECT'):
+            self.onDisconnect(event)
+        elif event.type == self.console.getEventID('EVT_CLIENT_NAME_CHANGE'):
+            self.onNameChange(event)
+
+    def onDisconnect(self, event):
+        """
+        Handle EVT_CLIENT_DISCONNECT
+        """
+        if event.client:
+            self.unsubscribe(event.client)
+            self.ratelimiter.forget(event.client.cid)
+
+    def onNameChange(self, event):
+        """
+        Handle EVT_CLIENT_NAME_CHANGE
+        """
+        # the client may have been reset by the parser: drop stale subscriptions
+        self.prune_subscribers()
 
     def onSay(self, event):
         """
@@ -343,47 +761,60 @@ class TranslatorPlugin(b3.plugin.Plugin):
         client = event.client
         message = event.data.strip()
 
-        # if not enough length
-        if len(message) < self.settings['min_sentence_length']:
+        # skip short messages and B3 commands
+        if not is_chat(message, self.settings['min_sentence_length'], self.cmdPrefix):
             return
 
-        # check if we are not spamming requests
-        curTime = time.time()
-        if self.lastTime and curTime - self.lastTime <= self.settings['min_time_between']:
+        # save for future use: the history drops the oldest message by itself
+        team_chat = event.type == self.console.getEventID('EVT_CLIENT_TEAM_SAY')
+        entry = self.history.add(message, client.cid, client.team, team_chat)
+
+        if not self.transauto:
             return
-        else:
-            # update last time with current time
-            self.lastTime = curTime
-
-        # if it's not a B3 command
-        if message[0] not in self.cmdPrefix:
-
-            # save for future use
-            self.last_message_said.append(message)
-            # remove old messages
-            if len(self.last_message) > self.settings['max_history']:
-                self.last_message.pop(0)
-
-            # we have now to send a translation to all the
-            # clients that enabled the automatic translation
-            collection = []
-            for c in self.console.clients.getList():
-                if c != client and c.isvar(self, 'transauto'):
-                    collection.append(c)
-
-            if not collection:
-                # no one has transauto enabled
-                return
 
-            translation = self.translate(message, to_lang=self.settings['default_target_language'])
-            if not translation:
-                # we didn't managed to get a valid translation
-                # no need to spam the chat of everyone with a silly message
-                return
+        # messages already written in the subscribers language are not translated: only the cheap
+        # heuristics are used here, the full detection (if needed) is performed by the workers
+        msg_lang = self.quick_language(entry)
 
-            for c in collection:
-                # send the translation to all the clients
-                self.send_translation(c, translation)
+        if self.batcher:
+            # the batch is translated when full or when batch_max_delay expires:
+            # check only the client budget here, the batch will take the upstream tokens
+            if self.ratelimiter.acquire(None, client.cid, upstream=False):
+                self.batcher.add((message, client, entry))
+            else:
+                self.metrics.incr('auto.throttled')
+            return
+
+        # we have now to send a translation to all the clients that enabled the
+        # automatic translation: translate once for every requested target language
+        targets = []
+        for lang, subscribers in self.transauto.items():
+            collection = [c for c in subscribers if c != client]
+            if collection and not self.skip_translation(message, 'auto', lang, msg_lang or ''):
+                targets.append((lang, collection, self.needs_request(message, 'auto', lang)))
+
+        # the chat line takes a single automatic translation token whatever the number of languages,
+        # then every request sent to the translation service takes a global token: the tokens
+        # are given back by the workers if the translation is found in the cache file
+        requests = len([x for x in targets if x[2]])
+        if requests and not self.ratelimiter.acquire('auto', client.cid, upstream=False):
+            self.verbose('auto translation throttled: %s' % message)
+            self.metrics.incr('auto.throttled')
+            targets = [x for x in targets if not x[2]]
+        line = Refund(self.ratelimiter, requests, 'auto', client.cid, upstream=False)
+
+        for lang, collection, request in targets:
+            if request and not self.ratelimiter.acquire():
+                self.verbose('auto translation throttled: %s -> %s' % (message, lang))
+                self.metrics.incr('auto.throttled')
+                continue
+            refund = Refund(self.ratelimiter, then=line) if request else None
+            if msg_lang is None:
+                self.run_async(partial(self.send_auto_translation, collection, speaker=client),
+                               self.translate_chat, (message, 'auto', lang, entry), 'auto', refund)
+            else:
+                self.translate_async(partial(self.send_auto_translation, collection, speaker=client),
+                                     message, 'auto', lang, 'auto', refund)
 
     ####################################################################################################################
     ##                                                                                                                ##
@@ -391,6 +822,70 @@ class TranslatorPlugin(b3.plugin.Plugin):
     ##                                                                                                                ##
     ####################################################################################################################
 
+    def flush_store(self):
+        """
+        Write pending translations to the persistent cache
+        """
+        try:
+            written = self.store.flush()
+            if written:
+                self.verbose('wrote %s translations to the persistent cache' % written)
+        except Exception, e:
+            self.error('could not write to the persistent translation cache: %s' % e)
+
+    def compact_store(self):
+        """
+        Remove old translations from the persistent cache
+        """
+        try:
+            removed = self.store.compact()
+            self.debug('persistent translation cache compacted: removed %s translations' % removed)
+        except Exception, e:
+            self.error('could not compact the persistent translation cache: %s' % e)
+
+    def timed_command(self, name, func):
+        """
+        Wrap a command handler recording its execution time in the plugin metrics
+        """
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.metrics.timer('command.%s' % name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def stats(self):
+        """
+        Return the plugin metrics along with the counters of the plugin components
+        """
+        stats = self.metrics.snapshot()
+        stats['cache'] = self.cache.stats()
+        stats['voice'] = self.voices.stats()
+        stats['queue'] = {
+            'pending': self.pool.pending if self.pool else 0,
+            'dropped': self.pool.dropped if self.pool else 0,
+            'expired': self.pool.expired if self.pool else 0,
+            'batch_dropped': self.batcher.dropped if self.batcher else 0,
+            'output_pending': self.pacer.pending,
+            'output_dropped': self.pacer.dropped,
+        }
+        stats['throttled'] = dict(self.ratelimiter.throttled)
+        stats['skipped'] = dict(self.skipfilter.skipped)
+        stats['shared'] = self.flights.shared
+        return stats
+
+    def write_stats(self):
+        """
+        Write the plugin statistics to the stats file, in JSON format
+        """
+        path = b3.getAbsolutePath(self.settings['stats_file'])
+        try:
+            stats = self.stats()
+            stats['time'] = int(time.time())
+            with open(path, 'w') as f:
+                json.dump(stats, f, indent=2, sort_keys=True)
+        except Exception, e:
+            self.error('could not write statistics to %s: %s' % (path, e))
+
     @staticmethod
     def to_byte_string(s):
         """
@@ -399,17 +894,13 @@ class TranslatorPlugin(b3.plugin.Plugin):
         """
         return s if isinstance(s, str) else s.encode('utf-8')
 
-    @staticmethod
-    def str_sanitize(s):
+    def str_sanitize(self, s):
         """
         Sanitize the given string.
         Will remove color codes, XML tags and substitute
         unprintable characters with their alphabetical representation.
         """
-        return re.sub('\^[0-9]', '', re.sub(r'<[^>]*>', '', s)).replace('ß', 'ss').replace('ü', 'ue').\
-               replace('ö', 'oe').replace('ä', 'ae').replace('à', 'a').replace('è', 'e').replace('é', 'e').\
-               replace('ì', 'i').replace('ò', 'o').replace('ù', 'u').replace('ç', 'c').replace('€', 'euro').\
-               replace('$', 'dollar').replace('£', 'pound').replace('%', 'pc').replace('"', "''").strip()
+        return self.sanitizer(s)
 
     ####################################################################################################################
     ##                                                                                                                ##
@@ -417,26 +908,302 @@ class TranslatorPlugin(b3.plugin.Plugin):
     ##                                                                                                                ##
     ####################################################################################################################
 
-    def send_translation(self, client, message, cmd=None):
+    def dispatch_translation(self, callback, kind, client, text, from_lang='auto', to_lang='en'):
         """
-        Send a translated message to a client
+        Translate the given text in background if the translation is cached or if the rate limiter
+        allows a new request to the translation service: cached translations don't consume tokens.
+        Return False if the translation has been throttled or dropped because the queue is full.
+        """
+        refund = None
+        if self.needs_request(text, from_lang, to_lang):
+            if not self.ratelimiter.acquire(kind, client.cid if client else None):
+                self.verbose('%s translation throttled: %s' % (kind, text))
+                self.metrics.incr('%s.throttled' % kind)
+                return False
+            refund = Refund(self.ratelimiter, 1, kind, client.cid if client else None)
+
+        return self.translate_async(callback, text, from_lang, to_lang, kind, refund)
+
+    def needs_request(self, text, from_lang='auto', to_lang='en'):
+        """
+        Tell whether translating text may require a request to the translation service: translations cached
+        in memory, known phrases and translations being performed won't cost one. The cache file is not looked
+        up here, not to query it from the event thread: the workers give back the tokens of its translations.
+        """
+        key = self.translation_key(text, from_lang, to_lang)
+        if self.cache.peek(key) is not None or self.flights.in_flight(key):
+            return False
+        if self.phrasebook.get(self.normalizer.clean(text), to_lang.split('-')[0]):
+            return False
+        return True
+
+    def translate_async(self, callback, text, from_lang='auto', to_lang='en', kind='command', refund=None):
+        """
+        Translate the given text in a worker thread and hand the result over to callback.
+        When no worker is available the translation is performed in the calling thread.
+        Return False if the translation has been dropped because the queue is full.
+        :param refund: A callable giving back the rate limiter tokens taken for the translation, if any
+        """
+        return self.run_async(callback, self.translate, (text, from_lang, to_lang), kind, refund)
+
+    def charged(self, refund, func, *args):
+        """
+        Execute func(*args), for which rate limiter tokens have been taken: call refund to give them back
+        if no request has been sent to the translation service (e.g. the translation was in the cache file)
+        """
+        sent = self.requests_sent()
+        try:
+            return func(*args)
+        finally:
+            if self.requests_sent() == sent:
+                refund()
+
+    def run_async(self, callback, func, args, kind='command', refund=None):
+        """
+        Execute func(*args) in a worker thread and hand the result over to callback.
+        When no worker is available func is executed in the calling thread.
+        Commands are executed before the automatic translations, which are discarded
+        first when the queue is full and when they waited longer than auto_max_age.
+        Return False if func has been dropped because the queue is full: callback is not invoked.
+        """
+        charged = partial(self.charged, refund, func) if refund else func
+
+        if not self.pool:
+            try:
+                result = charged(*args)
+            except Exception, e:
+                self.on_translation_error(args[0], e)
+                result = None
+            callback(result)
+            return True
+
+        deadline = None
+        if kind == 'auto' and self.settings['auto_max_age']:
+            deadline = time.time() + self.settings['auto_max_age']
+
+        self.metrics.observe('queue.depth', self.pool.pending)
+        if not self.pool.submit(charged, args, callback, self.priorities.get(kind, 0), deadline):
+            self.metrics.incr('queue.dropped')
+            self.debug('translation queue is full (%s pending): dropped message (%s)' % (self.pool.pending, args[0]))
+            if refund:
+                # no request will be sent
+                refund()
+            return False
+        return True
+
+    def on_chat_batch(self, batch):
+        """
+        Translate a batch of chat lines for all the transauto subscribers
+        """
+        targets = []
+        for lang, subscribers in self.transauto.items():
+            subscribers = list(subscribers)
+            if not subscribers:
+                continue
+            # skip the messages which don't need to be translated into this language
+            items = [(message, client, entry) for message, client, entry in batch
+                     if not self.skip_translation(message, 'auto', lang, self.quick_language(entry) or '')]
+            if items:
+                request = any(self.needs_request(message, 'auto', lang) for message, _, _ in items)
+                targets.append((lang, subscribers, items, request))
+
+        # the batch takes a single automatic translation token whatever the number of languages,
+        # then every request sent to the translation service takes a global token: the tokens
+        # are given back by the workers if the translations are found in the cache file
+        requests = len([x for x in targets if x[3]])
+        if requests and not self.ratelimiter.acquire('auto', upstream=False):
+            self.verbose('batch translation throttled: %s messages' % len(batch))
+            self.metrics.incr('auto.throttled', len(batch))
+            targets = [x for x in targets if not x[3]]
+        refund = Refund(self.ratelimiter, requests, 'auto', upstream=False)
+
+        for lang, subscribers, items, request in targets:
+            if request and not self.ratelimiter.acquire():
+                self.verbose('batch translation throttled: %s messages -> %s' % (len(items), lang))
+                self.metrics.incr('auto.throttled', len(items))
+                continue
+            args = ([message for message, _, _ in items], 'auto', lang, [entry for _, _, entry in items])
+            self.run_async(partial(self.send_auto_batch, items, subscribers), self.translate_chat_batch, args,
+                           'auto', Refund(self.ratelimiter, then=refund) if request else None)
+
+    def skip_translation(self, text, from_lang='auto', to_lang='en', lang=None):
+        """
+        Return the reason why the translation of text is not needed, or None
+        """
+        reason = self.skipfilter.check(text, from_lang, to_lang, lang)
+        if reason:
+            self.verbose('skipping translation (%s): %s -> %s' % (reason, text, to_lang))
+        return reason
+
+    def message_language(self, msg):
+        """
+        Return the language of a chat history message ('' if unknown), detecting it only once
+        """
+        if msg.lang is None:
+            msg.lang = self.detector.detect(msg.text) or ''
+        return msg.lang
+
+    def quick_language(self, msg):
+        """
+        Return the language of a chat history message ('' if unknown) using the cheap heuristics only,
+        or None if the full (slow) detection is needed to tell it
+        """
+        if msg.lang is None:
+            lang = self.detector.detect(msg.text, fallback=False)
+            if lang or not self.detector.fallback:
+                msg.lang = lang or ''
+        return msg.lang
+
+    def translate_chat(self, text, from_lang, to_lang, msg):
+        """
+        Translate a chat line unless the full language detection finds it already written in to_lang
+        """
+        if self.skip_translation(text, from_lang, to_lang, self.message_language(msg)):
+            return None
+        return self.translate(text, from_lang, to_lang)
+
+    def translate_chat_batch(self, texts, from_lang, to_lang, msgs):
+        """
+        Translate a list of chat lines, skipping (None) the ones the full language detection finds
+        already written in to_lang
+        """
+        skip = [bool(self.skip_translation(text, from_lang, to_lang, self.message_language(msg)))
+                for text, msg in zip(texts, msgs)]
+        todo = [text for text, skipped in zip(texts, skip) if not skipped]
+        translations = iter(self.translate_batch(todo, from_lang, to_lang) if todo else [])
+        return [None if skipped else next(translations) for skipped in skip]
+
+    def send_auto_batch(self, batch, subscribers, translations):
+        """
+        Send the translations of a batch of chat lines to the given subscribers
+        """
+        if not translations:
+            return
+
+        for (message, speaker, _), translation in zip(batch, translations):
+            self.send_auto_translation([c for c in subscribers if c != speaker], translation, speaker)
+
+    def on_translation_error(self, text, e):
+        """
+        Log a translation failure
+        """
+        if isinstance(e, BackendUnavailable):
+            # the circuit breakers are open: this is expected to happen for a while
+            self.verbose('could not translate message (%s): %s' % (text, e))
+        else:
+            self.error('could not translate message (%s): %s' % (text, e))
+
+    def on_backend_failure(self, backend, breaker, e):
+        """
+        Log a translation backend failure
+        """
+        self.warning('%s translation backend failed (%s consecutive failures, circuit %s): %s' %
+                     (backend.name, breaker.failures, breaker.state, e))
+
+    def send_auto_translation(self, collection, translation, speaker=None):
+        """
+        Send an automatic translation to all the given clients
+        """
+        if not translation:
+            # we didn't managed to get a valid translation
+            # no need to spam the chat of everyone with a silly message
+            return
+
+        if self.settings['always_loud'] or self.is_everyone(collection, speaker):
+            # a single broadcast instead of the same message to every player
+            self.pacer.put(None, self.console.say, self.format_output(translation))
+            return
+
+        for c in collection:
+            # send the translation to all the clients
+            self.send_translation(c, translation)
+
+    def is_everyone(self, collection, speaker=None):
+        """
+        Tell whether the given clients are all the connected ones (but the speaker)
+        """
+        if len(collection) < 2:
+            return False
+        cids = set(c.cid for c in collection)
+        if speaker:
+            cids.add(speaker.cid)
+        return all(c.cid in cids for c in self.console.clients.getList())
+
+    def subscribe(self, client, lang):
+        """
+        Enable automatic translation into the given language for a client
+        """
+        self.unsubscribe(client)
+        self.transauto.setdefault(lang, set()).add(client)
+        client.setvar(self, 'transauto', lang)
+
+    def unsubscribe(self, client):
+        """
+        Disable automatic translation for a client
+        """
+        if client.isvar(self, 'transauto'):
+            lang = client.var(self, 'transauto').value
+            subscribers = self.transauto.get(lang)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self.transauto[lang]
+            client.delvar(self, 'transauto')
+
+    def prune_subscribers(self):
+        """
+        Remove disconnected clients and clients which lost their subscription from the transauto index
+        """
+        for lang, subscribers in self.transauto.items():
+            for c in [x for x in subscribers if not x.connected or not x.isvar(self, 'transauto')]:
+                self.verbose('removing stale transauto subscriber: %s' % c.name)
+                subscribers.discard(c)
+            if not subscribers:
+                del self.transauto[lang]
+
+    def on_job_error(self, job, e):
+        """
+        Log an exception raised by a translation job
+        """
+        self.on_translation_error(job.args[0], e)
+        if job.callback:
+            # let the callback notify the failure
+            job.callback(None)
+
+    def on_callback_error(self, job, e):
+        """
+        Log an exception raised while delivering the result of a translation job
+        """
+        self.error('could not deliver translation (%s): %s' % (job.args[0], e))
+
+    def format_output(self, message):
+        """
+        Split a translated message into lines fitting the game chat
         """
         # prepend translator name if specified
         if self.settings['display_translator_name']:
             message = '%s %s' % (self.settings['translator_name'], message)
+        return split_message(message, self.line_length)
+
+    def send_translation(self, client, message, cmd=None):
+        """
+        Send a translated message to a client
+        """
+        chunks = self.format_output(message)
 
         # display the translated message
         if self.settings['always_loud']:
             # Loudly
-            self.console.say(message)
+            self.pacer.put(None, self.console.say, chunks)
         else:
             # Only to the player that asked for translation
             if not cmd:
-                client.message(message)
+                self.pacer.put(client.cid, client.message, chunks)
                 return
 
             # Or let's decide depending on the prefix
-            cmd.sayLoudOrPM(client, message)
+            recipient = None if getattr(cmd, 'loud', False) else client.cid
+            self.pacer.put(recipient, partial(cmd.sayLoudOrPM, client), chunks)
 
     ####################################################################################################################
     ##                                                                                                                ##
@@ -486,79 +1253,194 @@ class TranslatorPlugin(b3.plugin.Plugin):
             # get the real message to be translated
             data = m.group('message')
 
-        translation = self.translate(data, src, tar)
-        if not translation:
-            client.message('^7unable to translate')
+        if self.skip_translation(data, src, tar):
+            client.message('^7nothing to translate')
             return
 
-        # send the translation to the given client
-        self.send_translation(client, translation, cmd)
+        def deliver(translation):
+            if not translation:
+                client.message('^7unable to translate')
+                return
+
+            # send the translation to the given client
+            self.send_translation(client, translation, cmd)
+
+        if not self.dispatch_translation(deliver, 'command', client, data, src, tar):
+            client.message('^7translation limit reached, try again later')
 
     def cmd_translast(self, data, client, cmd=None):
         """
-        [<target>] - translate the last available sentence from the chat
+        [<client>|team] [<target>] - translate the last sentence from the chat (said by a player or by your team)
         """
-        if not self.last_message_said:
-            client.message('^7unable to translate, no last message found')
+        args = data.split() if data else []
+        if len(args) > 2:
+            client.message('^7Invalid data, try ^3!^7help translast')
             return
 
         # set default target language
         tar = self.settings['default_target_language']
 
-        if data:
-            if data not in self.languages:
-                self.verbose('invalid target language (%s) specified in !translast command: unable to translate' % data)
+        # the first argument is a player (or 'team') unless it's the only one and it's a language code
+        source = args.pop(0) if len(args) == 2 or (args and args[0] not in self.languages) else None
+
+        if args:
+            if args[0] not in self.languages:
+                self.verbose('invalid target language (%s) specified in !translast command: unable to translate' % args[0])
                 client.message('^7Invalid ^1target ^7language specified, try ^3!^7translang')
                 return
 
             # use the provided language code
-            tar = data
+            tar = args[0]
 
-        # exclude last messages with language we know well
-        excl_lang = self.settings['exclude_language']
-        if excl_lang:
-            for msg in self.last_message_said[::-1]:
+        if source is None:
+            last_msg = None
+            # exclude last messages with language we know well
+            excl_lang = self.settings['exclude_language']
+            for msg in self.history:
                 # keep this message as the one to translate
                 last_msg = msg
-                # Detect language: if not an excluded language, we break and keep this message
-                try:
-                    if langdetect.detect(msg) != excl_lang:
-                        break
-                except Exception as exc:
+                if not excl_lang:
+                    # just pick the last message in the history
+                    break
+                # if not an excluded language (or unknown), we break and keep this message
+                if self.message_language(msg) != excl_lang:
                     break
+        elif source == 'team':
+            last_msg = self.history.last_team(client.team)
         else:
-            # else, just pick the last message in the list
-            last_msg = self.last_message_said[-1]
+            sclient = self.adminPlugin.findClientPrompt(source, client)
+            if not sclient:
+                return
+            last_msg = self.history.last_from(sclient.cid)
 
-        # translate
-        message = self.translate(last_msg, to_lang=tar)
-        if not message:
-            client.message('^7unable to translate')
+        if not last_msg:
+            client.message('^7unable to translate, no last message found')
             return
 
-        # send the translation to the given client
-        self.send_translation(client, message, cmd)
+        if self.skip_translation(last_msg.text, 'auto', tar, self.message_language(last_msg)):
+            client.message('^7nothing to translate')
+            return
+
+        def deliver(message):
+            if not message:
+                client.message('^7unable to translate')
+                return
+
+            # send the translation to the given client
+            self.send_translation(client, message, cmd)
+
+        # translate
+        if not self.dispatch_translation(deliver, 'command', client, last_msg.text, to_lang=tar):
+            client.message('^7translation limit reached, try again later')
     
     def cmd_transauto(self, data, client, cmd=None):
         """
-        <on|off> - turn on/off the automatic translation
+        <on|off> [<target>] - turn on/off the automatic translation
         """
         if not data: 
             client.message('^7missing data, try ^3!^7help transauto')
             return
 
-        data = data.lower()
-        if data not in ('on', 'off'):
+        args = data.lower().split()
+        data = args[0]
+        if data not in ('on', 'off') or len(args) > 2:
             client.message('invalid data, try ^3!^7help transauto')
             return
 
+        # set default target language
+        lang = self.settings['default_target_language']
+        if len(args) == 2:
+            if args[1] not in self.languages:
+                self.verbose('invalid target language (%s) specified in !transauto command' % args[1])
+                client.message('^7invalid ^1target ^7language specified, try ^3!^7translang')
+                return
+            # use the provided language code
+            lang = args[1]
+
         if data == 'on':
-            client.setvar(self, 'transauto', True)
-            client.message('^7Transauto: ^2ON')
+            self.subscribe(client, lang)
+            client.message('^7Transauto: ^2ON ^7(^3%s^7)' % self.languages[lang])
         elif data == 'off':
-            client.delvar(self, 'transauto')
+            self.unsubscribe(client)
             client.message('^7Transauto: ^1OFF')
 
+    def cmd_transcache(self, data, client, cmd=None):
+        """
+        [clear] - display the translation cache statistics or clear the cache
+        """
+        if data:
+            if data.lower() != 'clear':
+                client.message('^7invalid data, try ^3!^7help transcache')
+                return
+            self.cache.clear()
+            client.message('^7Translation cache: ^1CLEARED')
+            return
+
+        stats = self.cache.stats()
+        stats['shared'] = self.flights.shared
+        stats['normalized'] = self.normalizer.ratio * 100
+        cmd.sayLoudOrPM(client, '^7Translation cache: ^2%(entries)s ^7entries (^2%(bytes)s ^7bytes), '
+                                '^2%(hits)s ^7hits, ^1%(misses)s ^7misses, ^3%(evictions)s ^7evictions, '
+                                '^2%(shared)s ^7shared, ^2%(normalized).1f ^7pct saved by normalization' % stats)
+
+    def cmd_transrate(self, data, client, cmd=None):
+        """
+        [<client>] - display the translation rate limiter state
+        """
+        sclient = None
+        if data:
+            sclient = self.adminPlugin.findClientPrompt(data, client)
+            if not sclient:
+                return
+
+        state = self.ratelimiter.state(sclient.cid if sclient else None)
+        if not state:
+            cmd.sayLoudOrPM(client, '^7Translation rate limiter: ^1disabled')
+            return
+
+        buckets = ['^3%s^7: ^2%.1f' % (k, state[k]) for k in ('global', 'auto', 'command', 'client') if k in state]
+        throttled = ['^3%s^7: ^1%s' % (k, v) for k, v in sorted(self.ratelimiter.throttled.items()) if v]
+        message = '^7Tokens: %s' % '^7, '.join(buckets)
+        if throttled:
+            message += ' ^7- throttled: %s' % '^7, '.join(throttled)
+        skipped = ['^3%s^7: ^2%s' % (k, self.skipfilter.skipped[k]) for k in SkipFilter.REASONS]
+        message += ' ^7- skipped: %s' % '^7, '.join(skipped)
+        cmd.sayLoudOrPM(client, message)
+
+    def cmd_transstats(self, data, client, cmd=None):
+        """
+        [reset] - display the translation statistics or reset them
+        """
+        if data:
+            if data.lower() != 'reset':
+                client.message('^7invalid data, try ^3!^7help transstats')
+                return
+            self.metrics.reset()
+            client.message('^7Translation statistics: ^1RESET')
+            return
+
+        stats = self.stats()
+        requests = dict((k, stats['counters'].get('requests.%s' % k, 0)) for k in OUTCOMES)
+        cmd.sayLoudOrPM(client, '^7Requests: ^2%(success)s ^7ok, ^3%(empty)s ^7empty, ^1%(http_error)s ^7http errors, '
+                                '^1%(timeout)s ^7timeouts, ^1%(error)s ^7errors, ^1%(unavailable)s ^7unavailable' % requests)
+
+        latency = self.metrics.histogram('upstream.latency')
+        latency['hit_ratio'] = stats['cache']['hit_ratio'] * 100
+        cmd.sayLoudOrPM(client, '^7Latency: ^2%(p50).0f^7/^3%(p95).0f^7/^1%(p99).0f ^7ms (p50/p95/p99), '
+                                'cache hit ratio: ^2%(hit_ratio).1f ^7pct' % latency)
+
+        queue = stats['queue']
+        queue['max'] = self.metrics.histogram('queue.depth')['max']
+        queue['throttled'] = stats['counters'].get('auto.throttled', 0)
+        queue['dropped'] += queue['batch_dropped'] + queue['output_dropped']
+        cmd.sayLoudOrPM(client, '^7Queue: ^2%(pending)s ^7pending (max ^3%(max)d^7), ^2%(output_pending)s ^7lines to send, '
+                                '^1%(dropped)s ^7dropped, ^1%(expired)s ^7expired, ^1%(throttled)s ^7auto translations throttled' % queue)
+
+        commands = ['^3%s^7: ^2%.0fms' % (name.split('.', 1)[1], value['p95'])
+                    for name, value in sorted(stats['histograms'].items()) if name.startswith('command.')]
+        if commands:
+            cmd.sayLoudOrPM(client, '^7Commands (p95): %s' % '^7, '.join(commands))
+
     def cmd_translang(self, data, client, cmd=None):
         """
         Display the list of available language codes
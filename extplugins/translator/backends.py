@@ -0,0 +1,314 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import json
+import time
+
+try:
+    from urllib import urlencode
+except ImportError:
+    from urllib.parse import urlencode
+
+try:
+    from urlparse import urlparse
+except ImportError:
+    from urllib.parse import urlparse
+
+from .breaker import CircuitBreaker
+from .httpclient import HttpClient
+from .phrasebook import PhraseBook
+
+
+class BackendUnavailable(Exception):
+    """
+    Raised when no translation backend can currently be used.
+    """
+    def __init__(self, message, errors=()):
+        Exception.__init__(self, message)
+        # the exceptions raised by the backends which have been tried
+        self.errors = list(errors)
+
+
+class TranslationBackend(object):
+    """
+    Base class for translation engines.
+    Backends return the translation unsanitized: the plugin takes care of cleaning it.
+    """
+    name = None
+
+    def __init__(self, **options):
+        self.options = options
+
+    def translate(self, text, from_lang='auto', to_lang='en'):
+        """
+        Translate text: return the message to be displayed or None if no translation is available.
+        """
+        raise NotImplementedError
+
+    def translate_batch(self, texts, from_lang='auto', to_lang='en'):
+        """
+        Translate a list of lines with a single request: return the list of translated
+        lines or None if the lines could not be translated together.
+        """
+        return None
+
+    def voice(self, text, lang='en'):
+        """
+        Return the pronunciation of text in mp3 bytes.
+        """
+        raise NotImplementedError('%s backend does not support text to speech' % self.name)
+
+    def close(self):
+        """
+        Release the resources held by the backend.
+        """
+        pass
+
+
+class GoogleBackend(TranslationBackend):
+    """
+    Translate using the Google Translate web API.
+    Note that the order or arguments in the URL matters.
+    """
+    name = 'google'
+    host = 'translate.googleapis.com'
+
+    def __init__(self, **options):
+        TranslationBackend.__init__(self, **options)
+        self.max_entries = options.get('max_entries', 5)
+        self.http = HttpClient(self.host,
+                               pool_size=options.get('pool_size', 2),
+                               connect_timeout=options.get('connect_timeout', 3.0),
+                               read_timeout=options.get('read_timeout', 5.0),
+                               max_response_size=options.get('max_response_size', 0))
+
+    def request_json(self, text, from_lang='auto', to_lang='en', max_entries=None):
+        """
+        Query the translation service, return the decoded json response.
+        The dictionary is requested only if max_entries is not 0.
+        """
+        if max_entries is None:
+            max_entries = self.max_entries
+
+        params = []
+        params.append('client=gtx')
+        params.append('sl=' + from_lang)
+        params.append('tl=' + to_lang)
+        params.append('hl=en-US')
+        params.append('dt=t')
+        if max_entries != 0:
+            # ask for the dictionary only if we are going to display it
+            params.append('dt=bd')
+        params.append('dj=1')
+        params.append('source=input')
+        params.append(urlencode({'q': text}))
+
+        response = self.http.get('/translate_a/single', '&'.join(params))
+        return self.parse_json(response.decode('utf8'))
+
+    @staticmethod
+    def parse_json(s):
+        """
+        Decode the json response.
+        """
+        result = json.loads(s)
+        # transliterations come as sentences without translation
+        result['sentences'] = [x for x in result.get('sentences', []) if 'trans' in x]
+        return result
+
+    def format_json(self, result, max_entries=5):
+        if max_entries is None:
+            max_entries = 999999
+
+        ret = []
+        for sentence in result['sentences']:
+            ret.append(sentence['orig'] + ': ' + sentence['trans'])
+            ret.append('')
+
+        # format pos
+        if 'dict' in result:
+            for pos in result['dict']:
+                ret.append(pos['pos'])
+                for entry in pos['entry'][:max_entries]:
+                    ret.append(entry['word'] + ': ' + ', '.join(entry['reverse_translation']))
+                ret.append('')
+
+        return '\n'.join(ret)
+
+    def translate(self, text, from_lang='auto', to_lang='en'):
+        return self.format_json(self.request_json(text, from_lang, to_lang), self.max_entries)
+
+    def translate_batch(self, texts, from_lang='auto', to_lang='en'):
+        rtn = self.request_json('\n'.join(texts), from_lang, to_lang, 0)
+        lines = ''.join(sentence['trans'] for sentence in rtn['sentences']).split('\n')
+        # the service may merge or split some lines
+        return lines if len(lines) == len(texts) else None
+
+    def voice(self, text, lang='en'):
+        params = []
+        params.append('client=gtx')
+        params.append('ie=UTF-8')
+        params.append('tl=' + lang)
+        params.append(urlencode({'q': text}))
+        return self.http.get('/translate_tts', '&'.join(params))
+
+    def close(self):
+        self.http.close()
+
+
+class LocalHttpBackend(TranslationBackend):
+    """
+    Translate using a self-hosted LibreTranslate compatible server.
+    """
+    name = 'local'
+
+    def __init__(self, **options):
+        TranslationBackend.__init__(self, **options)
+        url = urlparse(options.get('url') or 'http://127.0.0.1:5000')
+        self.path = url.path.rstrip('/') + '/translate'
+        self.api_key = options.get('api_key')
+        self.http = HttpClient(url.hostname, url.port,
+                               secure=url.scheme == 'https',
+                               pool_size=options.get('pool_size', 2),
+                               connect_timeout=options.get('connect_timeout', 3.0),
+                               read_timeout=options.get('read_timeout', 5.0),
+                               max_response_size=options.get('max_response_size', 0))
+
+    def request_json(self, q, from_lang='auto', to_lang='en'):
+        """
+        Query the translation server, return the decoded json response.
+        """
+        data = {'q': q, 'source': from_lang, 'target': to_lang, 'format': 'text'}
+        if self.api_key:
+            data['api_key'] = self.api_key
+        response = self.http.post(self.path, json.dumps(data))
+        return json.loads(response.decode('utf8'))
+
+    def translate(self, text, from_lang='auto', to_lang='en'):
+        translation = self.request_json(text, from_lang, to_lang).get('translatedText')
+        return '%s: %s' % (text, translation) if translation else None
+
+    def translate_batch(self, texts, from_lang='auto', to_lang='en'):
+        lines = self.request_json(list(texts), from_lang, to_lang).get('translatedText')
+        return lines if isinstance(lines, list) and len(lines) == len(texts) else None
+
+    def close(self):
+        self.http.close()
+
+
+class PhraseTableBackend(TranslationBackend):
+    """
+    Translate offline using a table of known phrases.
+    The table is an ini file with a section for every target language, mapping phrases to their translation.
+    An already loaded PhraseBook can be shared using the phrasebook option.
+    """
+    name = 'phrasebook'
+
+    def __init__(self, **options):
+        TranslationBackend.__init__(self, **options)
+        self.phrases = options.get('phrasebook')
+        if self.phrases is None:
+            self.phrases = PhraseBook()
+            if options.get('phrase_file'):
+                self.phrases.load(options['phrase_file'])
+
+    def lookup(self, text, to_lang):
+        """
+        Return the translation of a known phrase, or None.
+        """
+        return self.phrases.lookup(text, to_lang)
+
+    def translate(self, text, from_lang='auto', to_lang='en'):
+        translation = self.lookup(text, to_lang)
+        return '%s: %s' % (text, translation) if translation else None
+
+    def translate_batch(self, texts, from_lang='auto', to_lang='en'):
+        return [self.lookup(text, to_lang) or '' for text in texts]
+
+
+class FailoverBackend(TranslationBackend):
+    """
+    Guard a list of backends with circuit breakers: every call is handed over to the first backend
+    whose breaker is closed (or half-open), falling back to the next one when the call fails.
+    """
+    name = 'failover'
+
+    def __init__(self, backends, **options):
+        """
+        :param backends: The list of backends, by priority
+        :param options: The keyword arguments used to create the circuit breakers
+        """
+        TranslationBackend.__init__(self, **options)
+        self.backends = [(backend, CircuitBreaker(**options)) for backend in backends]
+        self.on_failure = None
+
+    def call(self, method, *args):
+        """
+        Invoke method on the first available backend.
+        :raise BackendUnavailable: If all the backends are failing
+        """
+        errors = []
+        failures = []
+        for backend, breaker in self.backends:
+            if not breaker.allow():
+                errors.append('%s: circuit open, retrying in %.0f seconds' % (backend.name, breaker.retry_in))
+                continue
+            start = time.time()
+            try:
+                result = getattr(backend, method)(*args)
+            except NotImplementedError:
+                breaker.success(time.time() - start)
+                errors.append('%s: not supported' % backend.name)
+                continue
+            except Exception as e:
+                breaker.failure()
+                errors.append('%s: %s' % (backend.name, e))
+                failures.append(e)
+                if self.on_failure:
+                    self.on_failure(backend, breaker, e)
+                continue
+            breaker.success(time.time() - start)
+            return result
+        raise BackendUnavailable('; '.join(errors), failures)
+
+    def translate(self, text, from_lang='auto', to_lang='en'):
+        return self.call('translate', text, from_lang, to_lang)
+
+    def translate_batch(self, texts, from_lang='auto', to_lang='en'):
+        return self.call('translate_batch', texts, from_lang, to_lang)
+
+    def voice(self, text, lang='en'):
+        return self.call('voice', text, lang)
+
+    def close(self):
+        for backend, _ in self.backends:
+            backend.close()
+
+
+BACKENDS = dict((x.name, x) for x in (GoogleBackend, LocalHttpBackend, PhraseTableBackend))
+
+
+def create_backend(name, **options):
+    """
+    Create the translation backend registered with the given name.
+    :raise KeyError: If no such backend is registered
+    """
+    return BACKENDS[name](**options)
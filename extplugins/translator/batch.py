@@ -0,0 +1,130 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import threading
+import time
+
+
+class ChatBatcher(object):
+    """
+    Collect chat lines and hand them over to a callback in batches.
+    A batch is flushed when it holds max_size lines or max_delay seconds after its first line,
+    but never earlier than min_interval seconds after the previous flush: while waiting, the
+    oldest lines are discarded to keep the batch within max_size.
+    """
+    def __init__(self, callback, max_size=10, max_delay=2.0, min_interval=0):
+        """
+        :param callback: A callable receiving the list of collected items
+        :param max_size: The maximum number of items in a batch
+        :param max_delay: The maximum number of seconds an item waits before the batch is flushed
+        :param min_interval: The minimum number of seconds between two flushes
+        """
+        self.callback = callback
+        self.max_size = max(1, max_size)
+        self.max_delay = max_delay
+        self.min_interval = min_interval
+        self.items = []
+        self.batches = 0
+        self.dropped = 0
+        self._last_flush = 0
+        self._deadline = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def add(self, item):
+        """
+        Add an item to the current batch.
+        """
+        with self._lock:
+            if len(self.items) >= self.max_size:
+                # we are waiting for min_interval to elapse
+                self.items.pop(0)
+                self.dropped += 1
+            self.items.append(item)
+            wait = self._wait()
+            if len(self.items) < self.max_size:
+                self._schedule(max(self.max_delay, wait))
+                return
+            if wait > 0:
+                self._schedule(wait)
+                return
+            batch = self._take()
+        self.callback(batch)
+
+    def flush(self):
+        """
+        Flush the current batch immediately, ignoring min_interval.
+        """
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self.callback(batch)
+
+    def cancel(self):
+        """
+        Discard the current batch and stop the pending timer.
+        """
+        with self._lock:
+            self.items = []
+            self._cancel_timer()
+
+    def _wait(self):
+        return self._last_flush + self.min_interval - time.time()
+
+    def _schedule(self, delay):
+        deadline = time.time() + delay
+        if self._deadline is not None and self._deadline <= deadline:
+            # the current timer fires early enough
+            return
+        self._cancel_timer()
+        self._deadline = deadline
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_timer(self):
+        if self._timer:
+            self._timer.cancel()
+        self._timer = None
+        self._deadline = None
+
+    def _take(self):
+        self._cancel_timer()
+        batch, self.items = self.items, []
+        if batch:
+            self._last_flush = time.time()
+            self.batches += 1
+        return batch
+
+    def _on_timer(self):
+        with self._lock:
+            if self._timer is not threading.current_thread():
+                # this timer has been cancelled while firing
+                return
+            self._timer = None
+            self._deadline = None
+            wait = self._wait()
+            if wait > 0:
+                self._schedule(wait)
+                return
+            batch = self._take()
+        if batch:
+            self.callback(batch)
@@ -0,0 +1,135 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import math
+import threading
+import time
+
+from collections import deque
+
+
+def percentile(values, p):
+    """
+    Return the p-th percentile (0-100) of the given values using the nearest-rank method.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = int(math.ceil(p / 100.0 * len(ordered))) - 1
+    return ordered[min(len(ordered) - 1, max(0, rank))]
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker guarding calls to an unreliable service.
+    The breaker opens after max_failures consecutive failures or when the latency percentile of the
+    recent calls exceeds max_latency. While open, calls are refused; once the backoff expires a single
+    probe call is let through (half-open): if it succeeds the breaker closes, otherwise it opens again
+    with a doubled backoff.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, max_failures=5, max_latency=0, latency_percentile=95, window=20,
+                 backoff=30.0, max_backoff=600.0):
+        """
+        :param max_failures: The number of consecutive failures which opens the breaker
+        :param max_latency: The latency, in seconds, which opens the breaker when exceeded by the percentile (0 to disable)
+        :param latency_percentile: The latency percentile checked against max_latency
+        :param window: The number of recent calls used to compute the latency percentile
+        :param backoff: The number of seconds the breaker stays open the first time
+        :param max_backoff: The maximum number of seconds the breaker stays open
+        """
+        self.max_failures = max(1, max_failures)
+        self.max_latency = max_latency
+        self.latency_percentile = latency_percentile
+        self.backoff = backoff
+        self.max_backoff = max(backoff, max_backoff)
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.refused = 0
+        self.latencies = deque(maxlen=window)
+        self._current_backoff = backoff
+        self._open_until = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Return True if a call can be performed.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.time() >= self._open_until:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                # let a single probe through
+                self._probing = True
+                return True
+            self.refused += 1
+            return False
+
+    def success(self, latency=0.0):
+        """
+        Record a successful call which took latency seconds.
+        """
+        with self._lock:
+            self.failures = 0
+            self.latencies.append(latency)
+            if self.state == self.HALF_OPEN:
+                self.state = self.CLOSED
+                self._probing = False
+                self._current_backoff = self.backoff
+                self.latencies.clear()
+            elif self.max_latency and len(self.latencies) == self.latencies.maxlen and \
+                    percentile(self.latencies, self.latency_percentile) > self.max_latency:
+                self._trip()
+                self.latencies.clear()
+
+    def failure(self):
+        """
+        Record a failed call.
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                # the probe failed: wait longer before the next one
+                self._current_backoff = min(self._current_backoff * 2, self.max_backoff)
+                self._trip()
+            elif self.state == self.CLOSED and self.failures >= self.max_failures:
+                self._trip()
+
+    @property
+    def retry_in(self):
+        """
+        Return the number of seconds before the next probe is allowed.
+        """
+        return max(0.0, self._open_until - time.time()) if self.state == self.OPEN else 0.0
+
+    def _trip(self):
+        self.state = self.OPEN
+        self.trips += 1
+        self._probing = False
+        self._open_until = time.time() + self._current_backoff
@@ -0,0 +1,138 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class TranslationCache(object):
+    """
+    In-memory LRU cache of translated messages.
+    Entries are keyed on (normalized text, source language, target language) and
+    evicted when the cache exceeds its entry/byte cap or when they are older than ttl.
+    """
+    def __init__(self, max_entries=1000, max_bytes=0, ttl=0):
+        """
+        :param max_entries: The maximum number of cached translations (0 disables the cache)
+        :param max_bytes: The maximum size of the cached translations, in bytes (0 means no limit)
+        :param ttl: The number of seconds after which a translation expires (0 means never)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    @staticmethod
+    def sizeof(key, value):
+        """
+        Return the (approximate) number of bytes used by a cache entry.
+        """
+        return len(key[0]) + len(value)
+
+    def get(self, key):
+        """
+        Return the translation stored for key, or None on a cache miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires = entry
+            if expires and expires < time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            # move the entry to the most recently used end
+            del self._entries[key]
+            self._entries[key] = entry
+            self.hits += 1
+            return value
+
+    def peek(self, key):
+        """
+        Return the translation stored for key without updating counters and recency.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[1] and entry[1] < time.time()):
+                return None
+            return entry[0]
+
+    def put(self, key, value, ttl=None):
+        """
+        Store a translation in the cache, evicting least recently used entries if needed.
+        """
+        if not self.enabled:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.time() + ttl if ttl else 0)
+            self.size += self.sizeof(key, value)
+            while self._entries and (len(self._entries) > self.max_entries or
+                                     (self.max_bytes and self.size > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Remove all the entries from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """
+        Return the cache counters as a dict.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_ratio': float(self.hits) / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, key):
+        value, _ = self._entries.pop(key)
+        self.size -= self.sizeof(key, value)
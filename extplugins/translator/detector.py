@@ -0,0 +1,223 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import re
+import threading
+
+try:
+    text_type = unicode
+except NameError:
+    text_type = str
+
+
+# unicode blocks written in a single language (or close enough for chat purposes)
+SCRIPTS = [
+    (0x0370, 0x03FF, 'el'),
+    (0x0400, 0x04FF, 'ru'),
+    (0x0590, 0x05FF, 'he'),
+    (0x0600, 0x06FF, 'ar'),
+    (0x0900, 0x097F, 'hi'),
+    (0x0E00, 0x0E7F, 'th'),
+    (0x3040, 0x30FF, 'ja'),
+    (0x4E00, 0x9FFF, 'zh'),
+    (0xAC00, 0xD7AF, 'ko'),
+]
+
+# cyrillic letters used in ukrainian but not in russian
+UKRAINIAN_LETTERS = set(u'іїєґІЇЄҐ')
+
+# frequent words of the languages written in latin script
+STOPWORDS = {
+    'en': u"the and you is are what this that with have for not was it's i'm don't your they just can will how why "
+          u"where who there here my we he she of to be do",
+    'it': u"che non per sono della questo anche ma perché cosa sei ciao gli lo ho hai è mi ti con del io noi molto "
+          u"bene grazie",
+    'fr': u"le les est je pas vous nous avec pour une des mais qui ça c'est bonjour merci oui très",
+    'de': u"der die das und ist nicht ich du ein eine mit sie wir auf ja nein was wie danke hallo bitte sehr auch "
+          u"noch aber",
+    'es': u"el los las por para pero muy qué hola gracias sí y yo usted tengo hay eso esto",
+    'pt': u"não você obrigado olá é eu muito mas com uma isso isto tem ele ela são também aqui",
+    'nl': u"het een niet ik wat van maar ook nee bedankt zijn hoe waarom jij wij",
+}
+
+
+def _build_stopwords(table):
+    """
+    Map every stop word to its language, dropping the words shared by more than one language.
+    """
+    languages = {}
+    for lang, words in table.items():
+        for word in set(words.split()):
+            languages.setdefault(word, set()).add(lang)
+    return dict((word, langs.pop()) for word, langs in languages.items() if len(langs) == 1)
+
+
+# stop word -> language, built on first use
+_WORDS = None
+TOKENS = re.compile(u"[^\\W\\d_]+(?:'[^\\W\\d_]+)?", re.UNICODE)
+
+
+def to_text(s):
+    """
+    Return the given string as unicode, decoding utf-8 byte strings.
+    """
+    return s if isinstance(s, text_type) else s.decode('utf-8', 'replace')
+
+
+def detect_script(text):
+    """
+    Return the language of a text written in a script used by a single language, or None.
+    The script must be used by the majority of the letters of the text.
+    """
+    counts = {}
+    letters = 0
+    for char in to_text(text):
+        if not char.isalpha():
+            continue
+        letters += 1
+        code = ord(char)
+        if code < 0x0370:
+            # latin
+            continue
+        for start, end, lang in SCRIPTS:
+            if start <= code <= end:
+                counts[lang] = counts.get(lang, 0) + 1
+                break
+
+    if not counts:
+        return None
+
+    lang = max(counts, key=counts.get)
+    if counts[lang] * 2 <= letters:
+        return None
+    if lang == 'zh' and 'ja' in counts:
+        # japanese mixes kanji with kana
+        return 'ja'
+    if lang == 'ru' and UKRAINIAN_LETTERS.intersection(to_text(text)):
+        return 'uk'
+    return lang
+
+
+def detect_stopwords(text):
+    """
+    Return the language whose frequent words clearly dominate the text, or None.
+    """
+    tokens = TOKENS.findall(to_text(text).lower())
+    if not tokens:
+        return None
+
+    global _WORDS
+    if _WORDS is None:
+        _WORDS = _build_stopwords(STOPWORDS)
+
+    hits = {}
+    for token in tokens:
+        lang = _WORDS.get(token)
+        if lang:
+            hits[lang] = hits.get(lang, 0) + 1
+
+    if not hits:
+        return None
+
+    ranking = sorted(hits.values(), reverse=True)
+    best = max(hits, key=hits.get)
+    if hits[best] * 4 < len(tokens):
+        # not enough evidence
+        return None
+    if len(ranking) > 1 and ranking[1] * 2 >= ranking[0]:
+        # too close to call
+        return None
+    return best
+
+
+class LangDetect(object):
+    """
+    Detect languages using langdetect, which is imported (and loads its language profiles) on
+    the first call only: B3 startup doesn't pay for it when no message ever needs it.
+    """
+    def __init__(self):
+        self.available = None
+        self._detect = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Import langdetect: return False if it's not installed.
+        """
+        with self._lock:
+            if self.available is None:
+                try:
+                    import langdetect
+                    # make the detection deterministic
+                    langdetect.DetectorFactory.seed = 0
+                    self._detect = langdetect.detect
+                    self.available = True
+                except ImportError:
+                    self.available = False
+        return self.available
+
+    def __call__(self, text):
+        if self.available is None:
+            self.load()
+        return self._detect(text) if self.available else None
+
+
+class LanguageDetector(object):
+    """
+    Detect the language of a text using cheap heuristics first, falling back to a full
+    detector (such as langdetect) only when the heuristics are not conclusive.
+    """
+    def __init__(self, fallback=None):
+        """
+        :param fallback: A function returning the language code of a text (None to use the heuristics only)
+        """
+        self.fallback = fallback
+        self.quick = 0
+        self.fallbacks = 0
+        self.unknown = 0
+
+    def detect(self, text, fallback=True):
+        """
+        Return the 2 letters code of the language of the text, or None if it can't be detected.
+        :param fallback: Whether to use the full detector when the heuristics are not conclusive
+        """
+        lang = detect_script(text) or detect_stopwords(text)
+        if lang:
+            self.quick += 1
+            return lang
+
+        if not fallback:
+            return None
+
+        if self.fallback:
+            self.fallbacks += 1
+            try:
+                lang = self.fallback(to_text(text))
+            except Exception:
+                # langdetect raises when the text has no features (numbers, symbols...)
+                lang = None
+
+        if not lang:
+            self.unknown += 1
+            return None
+
+        # langdetect reports chinese as zh-cn and zh-tw
+        return lang.split('-')[0]
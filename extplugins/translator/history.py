@@ -0,0 +1,122 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import threading
+import time
+
+
+class ChatMessage(object):
+    """
+    A chat line stored in the history.
+    """
+    __slots__ = ('seq', 'text', 'client_id', 'team', 'team_chat', 'time', 'lang')
+
+    def __init__(self, seq, text, client_id=None, team=None, team_chat=False):
+        self.seq = seq
+        self.text = text
+        self.client_id = client_id
+        self.team = team
+        self.team_chat = team_chat
+        self.time = time.time()
+        # detected language, computed on demand
+        self.lang = None
+
+    def __repr__(self):
+        return 'ChatMessage(%r, client_id=%r, team=%r)' % (self.text, self.client_id, self.team)
+
+
+class ChatHistory(object):
+    """
+    Fixed capacity ring buffer of chat messages, indexed by client and by team
+    so that the last message of a client or of a team chat is found in O(1).
+    """
+    def __init__(self, capacity=10):
+        """
+        :param capacity: The maximum number of messages kept in the history
+        """
+        self.capacity = max(1, capacity)
+        self._buffer = [None] * self.capacity
+        self._seq = 0
+        self._by_client = {}
+        self._by_team = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._seq, self.capacity)
+
+    def __iter__(self):
+        """
+        Iterate over the messages, newest first.
+        """
+        with self._lock:
+            messages = [self._buffer[(self._seq - i - 1) % self.capacity] for i in range(len(self))]
+        return iter(messages)
+
+    def add(self, text, client_id=None, team=None, team_chat=False):
+        """
+        Store a chat message, overwriting the oldest one when the history is full.
+        """
+        with self._lock:
+            message = ChatMessage(self._seq, text, client_id, team, team_chat)
+            slot = self._seq % self.capacity
+            old = self._buffer[slot]
+            if old is not None:
+                # drop the index entries pointing to the overwritten message
+                if self._by_client.get(old.client_id) is old:
+                    del self._by_client[old.client_id]
+                if self._by_team.get(old.team) is old:
+                    del self._by_team[old.team]
+            self._buffer[slot] = message
+            self._seq += 1
+            if client_id is not None:
+                self._by_client[client_id] = message
+            if team_chat and team is not None:
+                self._by_team[team] = message
+            return message
+
+    def last(self):
+        """
+        Return the newest message, or None if the history is empty.
+        """
+        with self._lock:
+            return self._buffer[(self._seq - 1) % self.capacity] if self._seq else None
+
+    def last_from(self, client_id):
+        """
+        Return the newest message said by the given client, or None.
+        """
+        return self._by_client.get(client_id)
+
+    def last_team(self, team):
+        """
+        Return the newest team chat message of the given team, or None.
+        """
+        return self._by_team.get(team)
+
+    def clear(self):
+        """
+        Remove all the messages.
+        """
+        with self._lock:
+            self._buffer = [None] * self.capacity
+            self._seq = 0
+            self._by_client.clear()
+            self._by_team.clear()
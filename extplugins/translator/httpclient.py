@@ -0,0 +1,193 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import socket
+import zlib
+
+try:
+    import httplib
+except ImportError:
+    import http.client as httplib
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+
+class HttpError(Exception):
+    """
+    Raised when the server replies with an error status code.
+    """
+    def __init__(self, status, reason):
+        Exception.__init__(self, 'HTTP Error %s: %s' % (status, reason))
+        self.status = status
+        self.reason = reason
+
+
+class ResponseTooLarge(Exception):
+    """
+    Raised when the response body exceeds the maximum allowed size.
+    """
+    pass
+
+
+class HttpClient(object):
+    """
+    Minimal HTTP client keeping a pool of keep-alive connections to a single host.
+    """
+    USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64; rv:45.0) Gecko/20100101 Firefox/45.0'
+
+    def __init__(self, host, port=None, secure=True, pool_size=2, connect_timeout=3.0, read_timeout=5.0,
+                 max_response_size=0):
+        """
+        :param host: The host to connect to
+        :param port: The port to connect to (defaults to the scheme default port)
+        :param secure: Whether to use HTTPS
+        :param pool_size: The maximum number of idle connections kept open
+        :param connect_timeout: The maximum time to wait for a connection to be established, in seconds
+        :param read_timeout: The maximum time to wait for the server to reply, in seconds
+        :param max_response_size: The maximum size of a (decompressed) response body, in bytes (0 for no limit)
+        """
+        self.host = host
+        self.port = port
+        self.secure = secure
+        self.connect_timeout = connect_timeout or None
+        self.read_timeout = read_timeout or None
+        self.max_response_size = max_response_size
+        self.requests = 0
+        self.connections = 0
+        self._idle = queue.LifoQueue(max(1, pool_size))
+
+    def get(self, path, query=''):
+        """
+        Perform a GET request and return the (decompressed) response body.
+        :param path: The path of the resource
+        :param query: The already encoded query string
+        :raise HttpError: If the server replies with an error status code
+        """
+        return self.request('GET', '%s?%s' % (path, query) if query else path)
+
+    def post(self, path, body, content_type='application/json'):
+        """
+        Perform a POST request and return the (decompressed) response body.
+        :param path: The path of the resource
+        :param body: The already encoded request body
+        :param content_type: The content type of the request body
+        :raise HttpError: If the server replies with an error status code
+        """
+        return self.request('POST', path, body, {'Content-Type': content_type})
+
+    def request(self, method, url, body=None, headers=None):
+        """
+        Perform an HTTP request using a pooled connection and return the (decompressed) response body.
+        """
+        headers = dict(headers or {})
+        headers.update({'User-Agent': self.USER_AGENT, 'Accept-Encoding': 'gzip', 'Connection': 'keep-alive'})
+        connection, reused = self._acquire()
+        try:
+            try:
+                response = self._request(connection, method, url, body, headers)
+            except (httplib.HTTPException, socket.error):
+                if not reused:
+                    raise
+                # the server closed the idle connection: retry with a new one
+                connection.close()
+                connection, reused = self._connect(), False
+                response = self._request(connection, method, url, body, headers)
+            body = self._read(response)
+        except Exception:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(connection)
+
+        self.requests += 1
+        if response.status >= 400:
+            raise HttpError(response.status, response.reason)
+
+        if response.getheader('Content-Encoding', '').lower() == 'gzip':
+            body = self._decompress(body)
+        return body
+
+    def close(self):
+        """
+        Close all the idle connections.
+        """
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _request(self, connection, method, url, body, headers):
+        if connection.sock is None:
+            connection.connect()
+            connection.sock.settimeout(self.read_timeout)
+        connection.request(method, url, body, headers)
+        return connection.getresponse()
+
+    def _read(self, response):
+        """
+        Read the response body, without reading more than max_response_size bytes.
+        """
+        limit = self.max_response_size
+        if not limit:
+            return response.read()
+        length = response.getheader('Content-Length')
+        if length and length.isdigit() and int(length) > limit:
+            raise ResponseTooLarge('response body too large: %s bytes' % length)
+        body = response.read(limit + 1)
+        if len(body) > limit:
+            raise ResponseTooLarge('response body too large: more than %s bytes' % limit)
+        return body
+
+    def _decompress(self, body):
+        """
+        Decompress a gzip encoded body, without inflating more than max_response_size bytes.
+        """
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if not self.max_response_size:
+            return decompressor.decompress(body) + decompressor.flush()
+        body = decompressor.decompress(body, self.max_response_size + 1)
+        if len(body) > self.max_response_size:
+            raise ResponseTooLarge('decompressed response body too large: more than %s bytes' % self.max_response_size)
+        return body
+
+    def _connect(self):
+        factory = httplib.HTTPSConnection if self.secure else httplib.HTTPConnection
+        self.connections += 1
+        return factory(self.host, self.port, timeout=self.connect_timeout)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._connect(), False
+
+    def _release(self, connection):
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
@@ -0,0 +1,159 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+
+import socket
+import threading
+import time
+
+from collections import deque
+from contextlib import contextmanager
+
+from .backends import BackendUnavailable
+from .breaker import percentile
+from .httpclient import HttpError
+
+# the outcomes of the requests sent to the translation service
+OUTCOMES = ('success', 'empty', 'http_error', 'timeout', 'error', 'unavailable')
+
+
+def outcome(error=None, result=None):
+    """
+    Return the outcome of a translation request given the exception it raised or its result.
+    """
+    if error is None:
+        return 'success' if result else 'empty'
+    if isinstance(error, BackendUnavailable):
+        # the outcome of the last backend tried, or no backend tried at all
+        return outcome(error.errors[-1]) if error.errors else 'unavailable'
+    if isinstance(error, HttpError):
+        return 'http_error'
+    if isinstance(error, socket.timeout) or 'timed out' in str(error):
+        # ssl sockets report timeouts with a generic ssl error
+        return 'timeout'
+    return 'error'
+
+
+class Histogram(object):
+    """
+    Keep the last samples of a measure to compute its percentiles.
+    """
+    def __init__(self, window=1000):
+        """
+        :param window: The number of samples kept
+        """
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples = deque(maxlen=window)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self._samples.append(value)
+
+    def percentile(self, p):
+        """
+        Return the p-th percentile (0-100) of the samples in the window.
+        """
+        return percentile(list(self._samples), p)
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
+
+
+class Metrics(object):
+    """
+    Thread safe collection of named counters and histograms.
+    """
+    def __init__(self, window=1000):
+        """
+        :param window: The number of samples kept by every histogram
+        """
+        self.window = window
+        self.started = time.time()
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name, count=1):
+        """
+        Increase a counter.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + count
+
+    def observe(self, name, value):
+        """
+        Add a sample to a histogram.
+        """
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self.window)
+            histogram.add(value)
+
+    @contextmanager
+    def timer(self, name):
+        """
+        Record the time spent in the block (in milliseconds) in a histogram, even if it raises.
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.time() - start) * 1000.0)
+
+    def counter(self, name):
+        return self._counters.get(name, 0)
+
+    def histogram(self, name):
+        """
+        Return the summary of a histogram (all zeros if it has no samples).
+        """
+        with self._lock:
+            histogram = self._histograms.get(name) or Histogram(1)
+            return histogram.summary()
+
+    def snapshot(self):
+        """
+        Return all the counters and the histogram summaries.
+        """
+        with self._lock:
+            return {
+                'uptime': time.time() - self.started,
+                'counters': dict(self._counters),
+                'histograms': dict((name, x.summary()) for name, x in self._histograms.items()),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._counters.clear()
+            self._histograms.clear()
@@ -0,0 +1,109 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import re
+
+from .sanitizer import GAMES
+
+try:
+    text_type = unicode
+except NameError:
+    text_type = str
+
+
+# runs of the same punctuation mark ("!!!", "??") and ellipses of any length
+REPEATED_PUNCTUATION = re.compile(r'([!?,;:])\1+')
+ELLIPSIS = re.compile(r'\.{2,}')
+# the same letter repeated 3 times or more ("helloooo"): 2 letters are kept, since
+# doubled letters are common ("good", "cool")
+ELONGATION = re.compile(r'([^\W\d_])\1{2,}', re.UNICODE)
+
+
+class Normalizer(object):
+    """
+    Map cosmetic variants of a chat line (color codes, case, repeated punctuation,
+    whitespace, elongated letters) to a single canonical form.
+    """
+    RULES = ('colors', 'whitespace', 'punctuation', 'elongation', 'case')
+
+    def __init__(self, rules=RULES, colors=GAMES['default']['colors'], track=1000):
+        """
+        :param rules: The normalization rules to apply
+        :param colors: The regular expression matching the game color codes (None if the game has no color codes)
+        :param track: The number of raw variants remembered to measure the requests saved by the normalization
+        """
+        unknown = set(rules) - set(self.RULES)
+        if unknown:
+            raise ValueError('unknown normalization rules: %s' % ', '.join(sorted(unknown)))
+        self.rules = tuple(x for x in self.RULES if x in rules)
+        self._colors = re.compile(colors, re.UNICODE).sub if colors and 'colors' in rules else None
+        self.track = track
+        self.requests = 0
+        self.saved = 0
+        self._seen = set()
+
+    @classmethod
+    def for_game(cls, game, rules=RULES):
+        """
+        Create a normalizer using the color codes of the given game.
+        """
+        return cls(rules, GAMES.get(game, GAMES['default'])['colors'])
+
+    def clean(self, text):
+        """
+        Return the text with all the rules but case applied: this is the text worth translating.
+        """
+        if self._colors:
+            text = self._colors('', text)
+        if 'punctuation' in self.rules:
+            text = ELLIPSIS.sub('...', REPEATED_PUNCTUATION.sub(r'\1', text))
+        if 'elongation' in self.rules:
+            text = ELONGATION.sub(r'\1\1', text)
+        if 'whitespace' in self.rules:
+            text = ' '.join(text.split())
+        return text
+
+    def key(self, text):
+        """
+        Return the canonical form of the text, used to look up translations.
+        """
+        text = self.clean(text)
+        return text.lower() if 'case' in self.rules else text
+
+    def account(self, text, hit):
+        """
+        Record a translation lookup: it's counted as saved if it hit the cache while
+        the very same variant of the text had never been looked up before.
+        """
+        self.requests += 1
+        variant = text.strip()
+        if hit and variant not in self._seen:
+            self.saved += 1
+        if len(self._seen) >= self.track:
+            self._seen.clear()
+        self._seen.add(variant)
+
+    @property
+    def ratio(self):
+        """
+        Return the fraction of lookups saved by the normalization.
+        """
+        return float(self.saved) / self.requests if self.requests else 0.0
@@ -0,0 +1,170 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import re
+import threading
+import time
+
+from collections import deque
+
+COLOR = re.compile(r'\^[0-9]')
+
+
+def split_message(text, width=80):
+    """
+    Split text into chunks of at most width characters, breaking lines at word boundaries.
+    Empty lines are dropped and the last color code of a chunk is carried over to the next one.
+    """
+    width = max(10, width)
+    chunks = []
+    for line in text.splitlines():
+        color = ''
+        current = ''
+        for word in line.split():
+            while word:
+                candidate = '%s %s' % (current, word) if current else color + word
+                if len(candidate) <= width:
+                    current, word = candidate, ''
+                    continue
+                if not current:
+                    # the word doesn't fit on a line of its own: hard split it
+                    current = candidate[:width]
+                    if current.endswith('^'):
+                        # don't separate a color code from its digit
+                        current = current[:-1]
+                    word = candidate[len(current):]
+                chunks.append(current)
+                colors = COLOR.findall(current)
+                color = colors[-1] if colors else color
+                current = ''
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+class MessagePacer(object):
+    """
+    Deliver messages through per-recipient queues, sending at most rate messages per second
+    overall so that the RCON socket is never flooded. Recipients are served round-robin.
+    """
+    def __init__(self, rate=0, queue_size=20, name='TranslatorPacer'):
+        """
+        :param rate: The maximum number of messages sent per second (0 to send them immediately)
+        :param queue_size: The maximum number of messages waiting for a single recipient (0 for no limit)
+        :param name: The name of the sender thread
+        """
+        self.rate = rate
+        self.queue_size = queue_size
+        self.name = name
+        self.sent = 0
+        self.dropped = 0
+        self._queues = {}
+        self._ready = deque()
+        self._running = False
+        self._thread = None
+        self._condition = threading.Condition()
+
+    @property
+    def pending(self):
+        """
+        Return the number of queued messages.
+        """
+        with self._condition:
+            return sum(len(x) for x in self._queues.values())
+
+    def put(self, recipient, send, chunks):
+        """
+        Queue the given chunks for a recipient.
+        :param recipient: A hashable identifying the recipient (None for broadcasts)
+        :param send: The function sending a single chunk
+        :param chunks: The list of chunks to send, in order
+        """
+        if not self.rate:
+            for chunk in chunks:
+                self._send(send, chunk)
+            return
+
+        with self._condition:
+            queue = self._queues.get(recipient)
+            if queue is None:
+                queue = self._queues[recipient] = deque()
+                self._ready.append(recipient)
+            for chunk in chunks:
+                if self.queue_size and len(queue) >= self.queue_size:
+                    # the recipient can't keep up: drop its oldest message
+                    queue.popleft()
+                    self.dropped += 1
+                queue.append((send, chunk))
+            if not self._running:
+                self._start()
+            self._condition.notify()
+
+    def stop(self):
+        """
+        Stop the sender thread discarding the queued messages.
+        """
+        with self._condition:
+            self._running = False
+            self._queues.clear()
+            self._ready.clear()
+            self._condition.notify()
+
+    def _start(self):
+        self._running = True
+        if self._thread:
+            # stopped and restarted before the thread noticed
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _next(self):
+        with self._condition:
+            while self._running and not self._ready:
+                self._condition.wait()
+            if not self._running:
+                self._thread = None
+                return None
+            recipient = self._ready.popleft()
+            queue = self._queues[recipient]
+            item = queue.popleft()
+            if queue:
+                # round-robin: back to the end of the line
+                self._ready.append(recipient)
+            else:
+                del self._queues[recipient]
+            return item
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            self._send(*item)
+            time.sleep(1.0 / self.rate)
+
+    def _send(self, send, chunk):
+        try:
+            send(chunk)
+            self.sent += 1
+        except Exception:
+            # a client may disconnect while its messages are queued
+            self.dropped += 1
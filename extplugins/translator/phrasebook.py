@@ -0,0 +1,104 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import io
+
+try:
+    from ConfigParser import RawConfigParser
+except ImportError:
+    from configparser import RawConfigParser
+
+
+class PhraseBook(object):
+    """
+    In-memory dictionary of known phrases indexed by (phrase, target language).
+    Every phrase maps to a tuple holding its translations by language position,
+    so that the table costs a single entry per phrase whatever the number of languages.
+    """
+    def __init__(self):
+        self.languages = []
+        self.hits = 0
+        self.misses = 0
+        self._index = {}
+        self._phrases = {}
+
+    def __len__(self):
+        return len(self._phrases)
+
+    @staticmethod
+    def normalize(text):
+        """
+        Return the form of a phrase used as dictionary key.
+        """
+        if str is bytes and not isinstance(text, str):
+            # python 2: phrases are stored as utf-8 byte strings
+            text = text.encode('utf-8')
+        return ' '.join(text.strip(' .!?').split()).lower()
+
+    def load(self, path):
+        """
+        Load phrases from an ini file having a section for every target language.
+        """
+        parser = RawConfigParser()
+        if str is bytes:
+            with open(path) as f:
+                parser.readfp(f)
+        else:
+            with io.open(path, encoding='utf-8') as f:
+                parser.read_file(f)
+        for lang in parser.sections():
+            for phrase, translation in parser.items(lang):
+                self.add(phrase, lang, translation)
+
+    def add(self, phrase, lang, translation):
+        """
+        Add the translation of a phrase into the given language.
+        """
+        position = self._index.get(lang)
+        if position is None:
+            position = self._index[lang] = len(self.languages)
+            self.languages.append(lang)
+        phrase = self.normalize(phrase)
+        translations = list(self._phrases.get(phrase, ()))
+        translations.extend([None] * (position + 1 - len(translations)))
+        translations[position] = translation.strip()
+        self._phrases[phrase] = tuple(translations)
+
+    def get(self, text, lang):
+        """
+        Return the translation of a known phrase, or None.
+        """
+        position = self._index.get(lang)
+        if position is None:
+            return None
+        translations = self._phrases.get(self.normalize(text))
+        return translations[position] if translations and position < len(translations) else None
+
+    def lookup(self, text, lang):
+        """
+        Same as get, but keeping track of hits and misses.
+        """
+        translation = self.get(text, lang)
+        if translation:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return translation
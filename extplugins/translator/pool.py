@@ -0,0 +1,252 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import threading
+import time
+
+from collections import deque
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+
+class TranslationJob(object):
+    """
+    A single unit of work handled by the worker pool.
+    """
+    __slots__ = ('func', 'args', 'callback', 'created', 'priority', 'deadline')
+
+    def __init__(self, func, args=(), callback=None, priority=0, deadline=None):
+        self.func = func
+        self.args = args
+        self.callback = callback
+        self.created = time.time()
+        self.priority = priority
+        self.deadline = deadline
+
+    @property
+    def expired(self):
+        return self.deadline is not None and time.time() > self.deadline
+
+
+class JobQueue(object):
+    """
+    Bounded queue serving jobs by priority (lower values first) and in arrival order within the same priority.
+    """
+    def __init__(self, maxsize=0):
+        """
+        :param maxsize: The maximum number of queued jobs (0 means unbounded)
+        """
+        self.maxsize = maxsize
+        self._levels = {}
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def qsize(self):
+        return self._size
+
+    def put_nowait(self, job):
+        """
+        Queue a job.
+        :raise queue.Full: If the queue is full
+        """
+        with self._condition:
+            if self.maxsize and self._size >= self.maxsize:
+                raise queue.Full
+            self._levels.setdefault(job.priority, deque()).append(job)
+            self._size += 1
+            self._condition.notify()
+
+    def evict(self, priority):
+        """
+        Remove and return the oldest job of the lowest priority not higher than the given one, or None.
+        """
+        with self._condition:
+            for level in sorted(self._levels, reverse=True):
+                if level < priority:
+                    break
+                if self._levels[level]:
+                    self._size -= 1
+                    return self._levels[level].popleft()
+            return None
+
+    def get(self, block=True):
+        """
+        Remove and return the first job, waiting for one if block is True.
+        Return None once the queue is closed.
+        :raise queue.Empty: If the queue is empty and block is False
+        """
+        with self._condition:
+            while not self._closed:
+                for level in sorted(self._levels):
+                    if self._levels[level]:
+                        self._size -= 1
+                        return self._levels[level].popleft()
+                if not block:
+                    raise queue.Empty
+                self._condition.wait()
+            return None
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def close(self):
+        """
+        Discard the queued jobs and wake up the consumers.
+        """
+        with self._condition:
+            self._closed = True
+            self._levels.clear()
+            self._size = 0
+            self._condition.notify_all()
+
+
+class WorkerPool(object):
+    """
+    Bounded pool of daemon threads consuming translation jobs from a priority queue.
+    The result of every job is handed over to the job callback (if any).
+    When the queue is full, jobs of lower priority are discarded to make room for the new ones,
+    and jobs whose deadline has passed are discarded instead of being executed.
+    """
+    POLICIES = ('drop_new', 'drop_oldest')
+
+    def __init__(self, workers=2, queue_size=32, policy='drop_new', on_error=None, on_callback_error=None,
+                 name='translator'):
+        """
+        :param workers: The number of worker threads
+        :param queue_size: The maximum number of pending jobs (0 means unbounded)
+        :param policy: What to do when the queue is full of jobs with the same priority: 'drop_new' or 'drop_oldest'
+        :param on_error: A callable(job, exception) invoked when a job raises
+        :param on_callback_error: A callable(job, exception) invoked when the callback of a job raises
+        :param name: A prefix for the worker threads name
+        """
+        if policy not in self.POLICIES:
+            raise ValueError('invalid queue policy: %s' % policy)
+        self.workers = max(1, workers)
+        self.policy = policy
+        self.on_error = on_error
+        self.on_callback_error = on_callback_error
+        self.name = name
+        self.queue = JobQueue(max(0, queue_size))
+        self.threads = []
+        self.dropped = 0
+        self.expired = 0
+        self.completed = 0
+        self._lock = threading.Lock()
+        self._running = False
+
+    @property
+    def pending(self):
+        """
+        Return the number of jobs waiting in the queue.
+        """
+        return self.queue.qsize()
+
+    def start(self):
+        """
+        Spawn the worker threads.
+        """
+        if self._running:
+            return
+        self._running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, args=(self.queue,), name='%s-worker-%d' % (self.name, i + 1))
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=None):
+        """
+        Stop the worker threads: jobs still in the queue are discarded.
+        """
+        if not self._running:
+            return
+        self._running = False
+        self.queue.close()
+        # the workers hold the closed queue: a restarted pool gets a new one
+        self.queue = JobQueue(self.queue.maxsize)
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def submit(self, func, args=(), callback=None, priority=0, deadline=None):
+        """
+        Schedule func(*args) for execution in a worker thread.
+        Return False if the job has been dropped because the queue is full.
+        The callback of a queued job evicted to make room for this one is invoked with None.
+        :param priority: The priority of the job: lower values are served first
+        :param deadline: The time after which the job is discarded if it has not been started yet (None for no limit)
+        """
+        return self._put(TranslationJob(func, args, callback, priority, deadline))
+
+    def _put(self, job):
+        with self._lock:
+            try:
+                self.queue.put_nowait(job)
+                return True
+            except queue.Full:
+                # shed the lower priority jobs first
+                victim = self.queue.evict(job.priority + 1)
+                if victim is None and self.policy == 'drop_oldest':
+                    victim = self.queue.evict(job.priority)
+                self.dropped += 1
+                if victim is None:
+                    return False
+                self.queue.put_nowait(job)
+        # let the requester of the evicted job know that it won't be served
+        self._deliver(victim, victim.callback, None)
+        return True
+
+    def _run(self, jobs):
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            if job.expired:
+                # too late to be of any use
+                with self._lock:
+                    self.expired += 1
+                continue
+            try:
+                result = job.func(*job.args)
+            except Exception as e:
+                self._deliver(job, self.on_error, job, e)
+            else:
+                self._deliver(job, job.callback, result)
+            with self._lock:
+                self.completed += 1
+
+    def _deliver(self, job, handler, *args):
+        """
+        Invoke the callback or the error handler of a job: its failures must not kill the worker.
+        """
+        try:
+            if handler:
+                handler(*args)
+        except Exception as e:
+            if self.on_callback_error:
+                try:
+                    self.on_callback_error(job, e)
+                except Exception:
+                    pass
@@ -0,0 +1,116 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import re
+
+from .detector import to_text
+
+
+# chat phrases understood by everyone: translating them is pointless
+# (gg, wp, noob and lag are translated by the bundled phrasebook instead)
+PHRASES = set(u"ggwp gl hf glhf gj nt ns n1 nice lol lool lmao rofl xd brb afk omg wtf np ty thx tnx ok okay "
+              u"kk nub rekt ez".split())
+
+# laughs in several languages (haha, hehe, jajaja, kkkk, xaxa, ...)
+LAUGHS = re.compile(u'^(?:(?:[hjx]+[aeiou]+){2,}h*|k{3,}|l+o+l+|x+d+)$', re.UNICODE)
+
+# western and eastern emoticons
+EMOTICONS = re.compile(u"^(?:[:;=8][-o'^]?[()\\[\\]dDpPoO0/\\\\|*3$@sSxX]+|<3+|\\^+[_.-]?\\^+|[oO0T-]_+[oO0T-]|:'\\()$")
+
+# punctuation stripped from the words before looking them up
+PUNCTUATION = u'.,;:!?"\'()[]{}<>~*'
+
+
+def is_chat(message, min_length=6, prefixes=('!', '@', '&', '/')):
+    """
+    Tell whether a chat line is a candidate for translation: long enough and not a command.
+    """
+    return len(message) >= max(1, min_length) and message[0] not in prefixes
+
+
+class SkipFilter(object):
+    """
+    Decide whether a translation request can be dropped before reaching the translation service:
+    messages already in the target language, universal chat phrases and messages which are mostly
+    emoticons, numbers or commands.
+    """
+    REASONS = ('language', 'phrase', 'noise', 'command')
+
+    def __init__(self, detector=None, prefixes=('!', '@', '&', '/')):
+        """
+        :param detector: The LanguageDetector used when the source language is not known
+        :param prefixes: The prefixes of the game and B3 commands
+        """
+        self.detector = detector
+        self.prefixes = tuple(prefixes)
+        self.skipped = dict((x, 0) for x in self.REASONS)
+
+    def classify(self, text):
+        """
+        Return the reason why the content of the text doesn't need to be translated, or None.
+        """
+        text = to_text(text).strip()
+        if not text:
+            return 'noise'
+        if text.startswith(self.prefixes):
+            return 'command'
+
+        words = phrases = noise = 0
+        for token in text.lower().split():
+            if EMOTICONS.match(token):
+                noise += 1
+                continue
+            token = token.strip(PUNCTUATION)
+            if not any(char.isalpha() for char in token):
+                # numbers and punctuation
+                noise += 1
+            elif token in PHRASES or LAUGHS.match(token):
+                phrases += 1
+            else:
+                words += 1
+
+        if not words:
+            return 'phrase' if phrases else 'noise'
+        if words * 2 < words + phrases + noise:
+            return 'noise'
+        return None
+
+    def check(self, text, from_lang='auto', to_lang='en', lang=None):
+        """
+        Return the reason why the translation of text can be skipped, or None.
+        :param lang: The already detected language of the text ('' if unknown), None to detect it now
+        """
+        reason = self.classify(text)
+        if not reason:
+            if from_lang and from_lang != 'auto':
+                lang = from_lang
+            elif lang is None and self.detector:
+                lang = self.detector.detect(text)
+            if lang and lang.split('-')[0] == to_lang.split('-')[0]:
+                reason = 'language'
+
+        if reason:
+            self.skipped[reason] += 1
+        return reason
+
+    @property
+    def total(self):
+        return sum(self.skipped.values())
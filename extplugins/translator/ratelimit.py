@@ -0,0 +1,193 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import threading
+import time
+
+
+class TokenBucket(object):
+    """
+    Classic token bucket: holds up to capacity tokens, refilled at rate tokens per second.
+    """
+    def __init__(self, rate, capacity):
+        """
+        :param rate: The number of tokens added every second
+        :param capacity: The maximum number of tokens in the bucket
+        """
+        self.rate = float(rate)
+        self.capacity = float(max(1, capacity))
+        self._tokens = self.capacity
+        self._stamp = time.time()
+
+    @property
+    def tokens(self):
+        """
+        Return the number of available tokens.
+        """
+        self.refill()
+        return self._tokens
+
+    def refill(self):
+        now = time.time()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def consume(self, tokens=1):
+        """
+        Take tokens from the bucket: return False if not enough tokens are available.
+        """
+        self.refill()
+        if self._tokens < tokens:
+            return False
+        self._tokens -= tokens
+        return True
+
+    def give(self, tokens=1):
+        """
+        Put back tokens which have been taken but not used.
+        """
+        self.refill()
+        self._tokens = min(self.capacity, self._tokens + tokens)
+
+
+class RateLimiter(object):
+    """
+    Rate limiter for the translation service made of token buckets:
+    a global bucket for all the upstream requests, one bucket for every kind of
+    request (automatic translations and commands) and one bucket for every client.
+    A request is allowed only if all the buckets involved have enough tokens.
+    """
+    KINDS = ('auto', 'command')
+
+    def __init__(self, global_rate=0, global_burst=1, client_rate=0, client_burst=1, **kinds):
+        """
+        Rates are expressed in requests per second (0 means unlimited).
+        Kind budgets are given as <kind>_rate and <kind>_burst keyword arguments.
+        """
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.upstream = TokenBucket(global_rate, global_burst) if global_rate else None
+        self.kinds = {}
+        for kind in self.KINDS:
+            rate = kinds.get('%s_rate' % kind, 0)
+            if rate:
+                self.kinds[kind] = TokenBucket(rate, kinds.get('%s_burst' % kind, 1))
+        self.clients = {}
+        self.allowed = 0
+        self.throttled = dict((x, 0) for x in ('global', 'client') + self.KINDS)
+        self._lock = threading.Lock()
+
+    def acquire(self, kind=None, client=None, tokens=1, upstream=True):
+        """
+        Take tokens from all the buckets involved in a request.
+        :param kind: The kind of request ('auto' or 'command')
+        :param client: The id of the client who originated the request (if any)
+        :param tokens: The number of upstream requests needed
+        :param upstream: Whether to take tokens from the global bucket
+        :return: True if the request is allowed, False otherwise
+        """
+        with self._lock:
+            buckets = []
+            if self.upstream and upstream:
+                buckets.append(('global', self.upstream))
+            if kind in self.kinds:
+                buckets.append((kind, self.kinds[kind]))
+            if client is not None and self.client_rate:
+                bucket = self.clients.get(client)
+                if bucket is None:
+                    bucket = self.clients[client] = TokenBucket(self.client_rate, self.client_burst)
+                buckets.append(('client', bucket))
+
+            for name, bucket in buckets:
+                if bucket.tokens < tokens:
+                    self.throttled[name] += 1
+                    return False
+
+            for name, bucket in buckets:
+                bucket.consume(tokens)
+
+            self.allowed += 1
+            return True
+
+    def release(self, kind=None, client=None, tokens=1, upstream=True):
+        """
+        Give back the tokens taken by acquire() for a request which has not been sent after all.
+        """
+        with self._lock:
+            if self.upstream and upstream:
+                self.upstream.give(tokens)
+            if kind in self.kinds:
+                self.kinds[kind].give(tokens)
+            if client is not None and client in self.clients:
+                self.clients[client].give(tokens)
+
+    def forget(self, client):
+        """
+        Drop the bucket of a client.
+        """
+        with self._lock:
+            self.clients.pop(client, None)
+
+    def state(self, client=None):
+        """
+        Return the number of tokens available in every bucket.
+        """
+        with self._lock:
+            state = {}
+            if self.upstream:
+                state['global'] = self.upstream.tokens
+            for kind, bucket in self.kinds.items():
+                state[kind] = bucket.tokens
+            if client is not None and self.client_rate:
+                bucket = self.clients.get(client)
+                state['client'] = bucket.tokens if bucket else float(self.client_burst)
+            return state
+
+
+class Refund(object):
+    """
+    Tokens taken for a number of requests, given back to the rate limiter once none of them has been sent.
+    """
+    def __init__(self, limiter, requests=1, kind=None, client=None, upstream=True, then=None):
+        """
+        :param limiter: The rate limiter the tokens have been taken from
+        :param requests: The number of requests covered by the tokens
+        :param then: An optional callable invoked after the tokens have been given back
+        """
+        self.limiter = limiter
+        self.requests = requests
+        self.kind = kind
+        self.client = client
+        self.upstream = upstream
+        self.then = then
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        """
+        Tell that one of the requests has not been sent.
+        """
+        with self._lock:
+            self.requests -= 1
+            if self.requests:
+                return
+        self.limiter.release(self.kind, self.client, upstream=self.upstream)
+        if self.then:
+            self.then()
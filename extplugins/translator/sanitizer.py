@@ -0,0 +1,92 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import re
+
+try:
+    text_type = unicode
+except NameError:
+    text_type = str
+
+
+# characters which can't be printed by the game and their alphabetical representation
+REPLACEMENTS = {
+    u'ß': u'ss', u'ü': u'ue', u'ö': u'oe', u'ä': u'ae', u'à': u'a', u'è': u'e', u'é': u'e', u'ì': u'i',
+    u'ò': u'o', u'ù': u'u', u'ç': u'c', u'€': u'euro', u'$': u'dollar', u'£': u'pound', u'%': u'pc',
+    u'"': u"''",
+}
+
+# quake 3 style color codes: XML tags in between are removed as well, so that
+# the result is the same as stripping the tags first and the color codes afterwards
+Q3_COLORS = u'\\^(?:<[^>]*>)*[0-9]'
+
+# sanitizing rules by game name (as in b3.xml): games not listed use the default ones
+GAMES = {
+    'default': {'colors': Q3_COLORS, 'replacements': REPLACEMENTS},
+    'bfbc2': {'colors': None, 'replacements': REPLACEMENTS},
+    'bf3': {'colors': None, 'replacements': REPLACEMENTS},
+    'bf4': {'colors': None, 'replacements': REPLACEMENTS},
+    'moh': {'colors': None, 'replacements': REPLACEMENTS},
+    'csgo': {'colors': None, 'replacements': REPLACEMENTS},
+    'insurgency': {'colors': None, 'replacements': REPLACEMENTS},
+    'arma2': {'colors': None, 'replacements': REPLACEMENTS},
+    'arma3': {'colors': None, 'replacements': REPLACEMENTS},
+}
+
+
+class Sanitizer(object):
+    """
+    Single pass string sanitizer: removes XML tags and color codes and substitutes
+    unprintable characters with their alphabetical representation.
+    """
+    def __init__(self, colors=Q3_COLORS, replacements=None):
+        """
+        :param colors: The regular expression matching color codes (None if the game has no color codes)
+        :param replacements: A dict mapping unprintable characters to their replacement
+        """
+        self.replacements = REPLACEMENTS if replacements is None else replacements
+        patterns = [u'<[^>]*>']
+        if colors:
+            patterns.append(colors)
+        # longest first, so that sequences win over their prefixes
+        patterns.extend(re.escape(x) for x in sorted(self.replacements, key=len, reverse=True))
+        # tags and color codes are not in the table: they are replaced with an empty string
+        table = dict(self.replacements)
+        self._unicode_sub = re.compile(u'|'.join(patterns), re.UNICODE).sub
+        self._unicode_repl = lambda m, get=table.get: get(m.group(), u'')
+        if text_type is not str:
+            # python 2: byte strings are matched against utf-8 encoded patterns
+            table = dict((k.encode('utf-8'), v.encode('utf-8')) for k, v in self.replacements.items())
+            self._bytes_sub = re.compile('|'.join(x.encode('utf-8') for x in patterns)).sub
+            self._bytes_repl = lambda m, get=table.get: get(m.group(), '')
+
+    @classmethod
+    def for_game(cls, game):
+        """
+        Create a sanitizer using the rules of the given game.
+        """
+        rules = GAMES.get(game, GAMES['default'])
+        return cls(rules['colors'], rules['replacements'])
+
+    def __call__(self, s):
+        if isinstance(s, text_type):
+            return self._unicode_sub(self._unicode_repl, s).strip()
+        return self._bytes_sub(self._bytes_repl, s).strip()
@@ -0,0 +1,82 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import threading
+
+
+class _Call(object):
+    """
+    A call in progress.
+    """
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesce concurrent calls sharing the same key: while a call is in progress, later calls
+    with the same key wait for it and share its result (or its exception) instead of running again.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self, key):
+        """
+        Tell whether a call with the given key is in progress.
+        """
+        return key in self._flights
+
+    def do(self, key, func, *args):
+        """
+        Return func(*args), or the result of the call with the same key already in progress.
+        """
+        with self._lock:
+            call = self._flights.get(key)
+            leader = call is None
+            if leader:
+                call = self._flights[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            call.done.set()
@@ -0,0 +1,153 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import sqlite3
+import threading
+import time
+
+
+class TranslationStore(object):
+    """
+    Persistent translation cache backed by a SQLite file.
+    The database is opened on first access, new translations are buffered in memory
+    and written in batches, and old entries are removed by compact().
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS translations (
+            text TEXT NOT NULL,
+            source TEXT NOT NULL,
+            target TEXT NOT NULL,
+            translation TEXT NOT NULL,
+            created INTEGER NOT NULL,
+            PRIMARY KEY (text, source, target)
+        )
+    """
+
+    def __init__(self, path, batch_size=20, ttl=0, max_entries=0):
+        """
+        :param path: The path of the SQLite database file
+        :param batch_size: The number of pending translations which triggers a write
+        :param ttl: The number of seconds after which a stored translation is removed by compact() (0 means never)
+        :param max_entries: The maximum number of stored translations kept by compact() (0 means no limit)
+        """
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}
+        self._connection = None
+        self._lock = threading.RLock()
+
+    @property
+    def connection(self):
+        """
+        Return the database connection, opening the database file if needed.
+        """
+        with self._lock:
+            if self._connection is None:
+                self._connection = sqlite3.connect(self.path, check_same_thread=False)
+                self._connection.text_factory = str
+                self._connection.execute(self.SCHEMA)
+                self._connection.commit()
+            return self._connection
+
+    def get(self, key):
+        """
+        Return the translation stored for key, or None if it's not available.
+        """
+        with self._lock:
+            value = self._pending.get(key)
+            if value is None:
+                row = self.connection.execute('SELECT translation FROM translations '
+                                              'WHERE text = ? AND source = ? AND target = ?', key).fetchone()
+                value = row[0] if row else None
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Schedule a translation to be written: the batch is flushed when full.
+        """
+        with self._lock:
+            self._pending[key] = value
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """
+        Write all the pending translations in a single transaction.
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            now = int(time.time())
+            rows = [(k[0], k[1], k[2], v, now) for k, v in self._pending.items()]
+            with self.connection:
+                self.connection.executemany('INSERT OR REPLACE INTO translations '
+                                            '(text, source, target, translation, created) '
+                                            'VALUES (?, ?, ?, ?, ?)', rows)
+            self._pending.clear()
+            return len(rows)
+
+    def compact(self):
+        """
+        Remove expired translations and the oldest ones exceeding max_entries, then reclaim disk space.
+        Return the number of removed translations.
+        """
+        self.flush()
+        with self._lock:
+            removed = 0
+            with self.connection:
+                if self.ttl:
+                    cursor = self.connection.execute('DELETE FROM translations WHERE created < ?',
+                                                     (int(time.time() - self.ttl),))
+                    removed += cursor.rowcount
+                if self.max_entries:
+                    cursor = self.connection.execute('DELETE FROM translations WHERE rowid NOT IN '
+                                                     '(SELECT rowid FROM translations ORDER BY created DESC LIMIT ?)',
+                                                     (self.max_entries,))
+                    removed += cursor.rowcount
+            if removed:
+                self.connection.execute('VACUUM')
+            return removed
+
+    def count(self):
+        """
+        Return the number of stored translations (pending ones included).
+        """
+        with self._lock:
+            self.flush()
+            return self.connection.execute('SELECT COUNT(*) FROM translations').fetchone()[0]
+
+    def close(self):
+        """
+        Flush pending translations and close the database.
+        """
+        with self._lock:
+            self.flush()
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,247 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+from __future__ import absolute_import
+
+import hashlib
+import os
+import threading
+
+from collections import OrderedDict
+
+from .singleflight import SingleFlight
+
+try:
+    text_type = unicode
+except NameError:
+    text_type = str
+
+
+def _bytes(s):
+    return s.encode('utf-8') if isinstance(s, text_type) else s
+
+
+class VoiceCache(object):
+    """
+    Cache of text to speech audio, content-addressed by the sha1 of the text and its language.
+    Audio is kept in an LRU memory tier bounded in bytes and, optionally, in a directory of files.
+    Concurrent fetches of the same audio are performed once.
+    """
+    EXTENSION = '.mp3'
+
+    def __init__(self, max_bytes=4194304, path=None, max_disk_bytes=0):
+        """
+        :param max_bytes: The maximum size of the audio kept in memory, in bytes (0 disables the memory tier)
+        :param path: The directory where audio files are stored (None disables the disk tier)
+        :param max_disk_bytes: The maximum size of the stored audio files, in bytes (0 means no limit)
+        """
+        self.max_bytes = max_bytes
+        self.path = path
+        self.max_disk_bytes = max_disk_bytes
+        self.size = 0
+        self.disk_size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.flights = SingleFlight()
+        self._entries = OrderedDict()
+        # digest -> file size, least recently used first: loaded on first use
+        self._files = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def digest(text, lang):
+        """
+        Return the address of the audio of text pronounced in the given language.
+        """
+        return hashlib.sha1(_bytes(lang) + b'\0' + _bytes(text)).hexdigest()
+
+    def get(self, text, lang, fetch):
+        """
+        Return the audio of text pronounced in the given language, calling fetch(text, lang) on a cache miss.
+        """
+        digest = self.digest(text, lang)
+        audio = self.lookup(digest)
+        if audio is None:
+            audio = self.flights.do(digest, self._fetch, digest, fetch, text, lang)
+        return audio
+
+    def contains(self, text, lang):
+        """
+        Tell whether the audio of text is cached, without updating counters and recency.
+        """
+        digest = self.digest(text, lang)
+        files = self.files if self.path is not None else ()
+        with self._lock:
+            return digest in self._entries or digest in files
+
+    def lookup(self, digest):
+        """
+        Return the cached audio with the given address, or None.
+        """
+        files = self.files if self.path is not None else ()
+        with self._lock:
+            audio = self._entries.get(digest)
+            if audio is not None:
+                # move the entry to the most recently used end
+                del self._entries[digest]
+                self._entries[digest] = audio
+                self.hits += 1
+                return audio
+            if digest not in files:
+                self.misses += 1
+                return None
+
+        # the file is read without holding the lock, not to block the lookups of the memory tier
+        try:
+            audio = self._read(digest)
+        except (IOError, OSError):
+            with self._lock:
+                # removed behind our back
+                self._forget(digest)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            if digest in files:
+                files[digest] = files.pop(digest)
+            self.disk_hits += 1
+            self._remember(digest, audio)
+            return audio
+
+    def put(self, digest, audio):
+        """
+        Store audio in the memory tier and in the disk tier.
+        Return False if the audio could not be written to the disk tier.
+        """
+        if not audio:
+            return True
+        try:
+            files = self.files if self.path is not None else None
+            with self._lock:
+                self._remember(digest, audio)
+                if files is None or digest in files:
+                    return True
+            self._write(digest, audio)
+        except (IOError, OSError):
+            # the disk tier is best effort: the audio is still returned to the caller
+            return False
+        return True
+
+    @property
+    def files(self):
+        """
+        Return the index of the stored audio files, scanning the directory if needed.
+        The directory is scanned without holding the lock: don't call it while holding it.
+        """
+        if self._files is None:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path)
+            files = []
+            for name in os.listdir(self.path):
+                if name.endswith(self.EXTENSION):
+                    stat = os.stat(os.path.join(self.path, name))
+                    files.append((stat.st_mtime, name[:-len(self.EXTENSION)], stat.st_size))
+            with self._lock:
+                if self._files is None:
+                    self._files = OrderedDict((digest, size) for _, digest, size in sorted(files))
+                    self.disk_size = sum(self._files.values())
+        return self._files
+
+    def clear(self):
+        """
+        Remove all the audio from the memory tier.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """
+        Return the cache counters as a dict.
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'files': len(self._files or ()),
+                'file_bytes': self.disk_size,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'shared': self.flights.shared,
+            }
+
+    def _fetch(self, digest, fetch, text, lang):
+        audio = fetch(text, lang)
+        self.put(digest, audio)
+        return audio
+
+    def _remember(self, digest, audio):
+        if len(audio) > self.max_bytes:
+            return
+        if digest in self._entries:
+            self.size -= len(self._entries.pop(digest))
+        self._entries[digest] = audio
+        self.size += len(audio)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def _filename(self, digest):
+        return os.path.join(self.path, digest + self.EXTENSION)
+
+    def _read(self, digest):
+        with open(self._filename(digest), 'rb') as f:
+            audio = f.read()
+        os.utime(self._filename(digest), None)
+        return audio
+
+    def _write(self, digest, audio):
+        # the same audio may be written by several threads: each one uses its own temporary file
+        temp = '%s.%s.tmp' % (self._filename(digest), threading.current_thread().ident)
+        with open(temp, 'wb') as f:
+            f.write(audio)
+        os.rename(temp, self._filename(digest))
+        files = self.files
+        evicted = []
+        with self._lock:
+            if digest in files:
+                return
+            files[digest] = len(audio)
+            self.disk_size += len(audio)
+            while self.max_disk_bytes and self.disk_size > self.max_disk_bytes and len(files) > 1:
+                oldest = next(iter(files))
+                self._forget(oldest)
+                evicted.append(oldest)
+        # the files are removed without holding the lock
+        for oldest in evicted:
+            try:
+                os.remove(self._filename(oldest))
+            except OSError:
+                pass
+
+    def _forget(self, digest):
+        self.disk_size -= self._files.pop(digest, 0)
@@ -0,0 +1,104 @@
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import os
+import json
+import shutil
+import tempfile
+import unittest2
+
+from mockito import when
+from textwrap import dedent
+from translator.backends import BACKENDS
+from translator.backends import GoogleBackend
+from translator.backends import LocalHttpBackend
+from translator.backends import PhraseTableBackend
+from translator.backends import create_backend
+
+
+class Test_backends(unittest2.TestCase):
+
+    def test_registry(self):
+        self.assertSetEqual({'google', 'local', 'phrasebook'}, set(BACKENDS))
+        self.assertIsInstance(create_backend('phrasebook'), PhraseTableBackend)
+        with self.assertRaises(KeyError):
+            create_backend('unknown')
+
+    def test_google_format_json(self):
+        # GIVEN
+        backend = GoogleBackend(max_entries=1)
+        when(backend).request_json('ciao', 'auto', 'en').thenReturn({
+            'sentences': [{'orig': 'ciao', 'trans': 'hello'}],
+            'dict': [{'pos': 'interjection', 'entry': [{'word': 'hello', 'reverse_translation': ['ciao', 'salve']},
+                                                       {'word': 'bye', 'reverse_translation': ['ciao']}]}]})
+        # THEN
+        self.assertEqual('ciao: hello\n\ninterjection\nhello: ciao, salve\n', backend.translate('ciao', 'auto', 'en'))
+
+    def test_google_parse_json(self):
+        # GIVEN
+        response = json.dumps({
+            'sentences': [{'trans': 'hello', 'orig': 'ciao', 'backend': 3}, {'translit': 'ciao'}],
+            'dict': [{'pos': 'interjection', 'terms': ['hello', 'bye', 'hi'],
+                      'entry': [{'word': 'hello', 'reverse_translation': ['ciao', 'salve'], 'score': 0.5},
+                                {'word': 'bye', 'reverse_translation': ['ciao']},
+                                {'word': 'hi', 'reverse_translation': ['ciao']}]}],
+            'src': 'it', 'ld_result': {'srclangs': ['it']}})
+        # WHEN
+        result = GoogleBackend.parse_json(response)
+        # THEN
+        self.assertListEqual([{'trans': 'hello', 'orig': 'ciao', 'backend': 3}], result['sentences'])
+        self.assertEqual('ciao: hello\n\ninterjection\nhello: ciao, salve\nbye: ciao\n', GoogleBackend().format_json(result, 2))
+
+    def test_google_translate_batch_mismatch(self):
+        # GIVEN
+        backend = GoogleBackend()
+        when(backend).request_json('uno\ndue', 'auto', 'en', 0).thenReturn({
+            'sentences': [{'orig': 'uno due', 'trans': 'one two'}]})
+        # THEN
+        self.assertIsNone(backend.translate_batch(['uno', 'due'], 'auto', 'en'))
+
+    def test_local_backend(self):
+        # GIVEN
+        backend = LocalHttpBackend(url='http://localhost:5000/api')
+        when(backend).request_json('ciao', 'auto', 'en').thenReturn({'translatedText': 'hello'})
+        when(backend).request_json(['ciao', 'grazie'], 'auto', 'en').thenReturn({'translatedText': ['hello', 'thanks']})
+        # THEN
+        self.assertEqual('/api/translate', backend.path)
+        self.assertEqual('ciao: hello', backend.translate('ciao', 'auto', 'en'))
+        self.assertListEqual(['hello', 'thanks'], backend.translate_batch(['ciao', 'grazie'], 'auto', 'en'))
+
+    def test_phrasebook_backend(self):
+        # GIVEN
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'phrases.ini')
+            with open(path, 'w') as f:
+                f.write(dedent(r"""
+                    [it]
+                    good game: bella partita
+                    nice shot: bel colpo
+                """))
+            backend = PhraseTableBackend(phrase_file=path)
+        finally:
+            shutil.rmtree(tmpdir)
+        # THEN
+        self.assertEqual('Good  Game: bella partita', backend.translate('Good  Game', 'auto', 'it'))
+        self.assertIsNone(backend.translate('good game', 'auto', 'fr'))
+        self.assertListEqual(['bel colpo', ''], backend.translate_batch(['nice shot', 'lag'], 'auto', 'it'))
+        with self.assertRaises(NotImplementedError):
+            backend.voice('good game')
@@ -0,0 +1,79 @@
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import threading
+import time
+import unittest2
+
+from translator.batch import ChatBatcher
+
+
+class Test_batch(unittest2.TestCase):
+
+    def setUp(self):
+        self.batches = []
+        self.flushed = threading.Event()
+
+    def on_batch(self, batch):
+        self.batches.append(batch)
+        self.flushed.set()
+
+    def test_flush_when_batch_is_full(self):
+        # GIVEN
+        batcher = ChatBatcher(self.on_batch, max_size=2, max_delay=60)
+        # WHEN
+        batcher.add('a')
+        batcher.add('b')
+        # THEN
+        self.assertListEqual([['a', 'b']], self.batches)
+
+    def test_flush_after_max_delay(self):
+        # GIVEN
+        batcher = ChatBatcher(self.on_batch, max_size=10, max_delay=0.05)
+        # WHEN
+        batcher.add('a')
+        batcher.add('b')
+        self.flushed.wait(5)
+        # THEN
+        self.assertListEqual([['a', 'b']], self.batches)
+
+    def test_min_interval_delays_flush_and_drops_oldest(self):
+        # GIVEN
+        batcher = ChatBatcher(self.on_batch, max_size=2, max_delay=60, min_interval=0.2)
+        batcher.add('a')
+        batcher.add('b')
+        self.flushed.clear()
+        # WHEN
+        batcher.add('c')
+        batcher.add('d')
+        batcher.add('e')
+        # THEN
+        self.assertListEqual([['a', 'b']], self.batches)
+        self.flushed.wait(5)
+        self.assertListEqual([['a', 'b'], ['d', 'e']], self.batches)
+        self.assertEqual(1, batcher.dropped)
+
+    def test_cancel(self):
+        # GIVEN
+        batcher = ChatBatcher(self.on_batch, max_size=10, max_delay=0.05)
+        batcher.add('a')
+        # WHEN
+        batcher.cancel()
+        time.sleep(0.1)
+        # THEN
+        self.assertListEqual([], self.batches)
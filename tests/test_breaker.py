@@ -0,0 +1,114 @@
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import time
+import unittest2
+
+from translator.backends import BackendUnavailable
+from translator.backends import FailoverBackend
+from translator.backends import TranslationBackend
+from translator.breaker import CircuitBreaker
+from translator.breaker import percentile
+
+
+class FakeBackend(TranslationBackend):
+
+    def __init__(self, name, fail=False):
+        TranslationBackend.__init__(self)
+        self.name = name
+        self.fail = fail
+        self.calls = 0
+
+    def translate(self, text, from_lang='auto', to_lang='en'):
+        self.calls += 1
+        if self.fail:
+            raise IOError('connection refused')
+        return '%s: %s' % (self.name, text)
+
+
+class Test_breaker(unittest2.TestCase):
+
+    def test_percentile(self):
+        self.assertEqual(0.0, percentile([], 95))
+        self.assertEqual(95, percentile(range(1, 101), 95))
+        self.assertEqual(2, percentile([3, 1, 2], 50))
+
+    def test_opens_after_consecutive_failures(self):
+        # GIVEN
+        breaker = CircuitBreaker(max_failures=2, backoff=60)
+        # WHEN
+        breaker.failure()
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+        breaker.failure()
+        # THEN
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+        self.assertFalse(breaker.allow())
+
+    def test_half_open_probe(self):
+        # GIVEN
+        breaker = CircuitBreaker(max_failures=1, backoff=0.01, max_backoff=1)
+        breaker.failure()
+        time.sleep(0.02)
+        # WHEN
+        self.assertTrue(breaker.allow())
+        # THEN (only one probe at a time)
+        self.assertFalse(breaker.allow())
+        breaker.success(0.1)
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+
+    def test_failed_probe_doubles_backoff(self):
+        # GIVEN
+        breaker = CircuitBreaker(max_failures=1, backoff=0.01, max_backoff=1)
+        breaker.failure()
+        time.sleep(0.02)
+        # WHEN
+        breaker.allow()
+        breaker.failure()
+        # THEN
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+        self.assertEqual(0.02, breaker._current_backoff)
+
+    def test_opens_on_high_latency(self):
+        # GIVEN
+        breaker = CircuitBreaker(max_latency=1.0, window=4)
+        # WHEN
+        for latency in (2.0, 2.0, 2.0, 2.0):
+            breaker.success(latency)
+        # THEN
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+
+    def test_failover_to_secondary_backend(self):
+        # GIVEN
+        primary = FakeBackend('primary', fail=True)
+        secondary = FakeBackend('secondary')
+        backend = FailoverBackend([primary, secondary], max_failures=1, backoff=60)
+        # WHEN
+        self.assertEqual('secondary: ciao', backend.translate('ciao'))
+        self.assertEqual('secondary: ciao', backend.translate('ciao'))
+        # THEN (the primary backend is not called while its circuit is open)
+        self.assertEqual(1, primary.calls)
+        self.assertEqual(2, secondary.calls)
+
+    def test_all_backends_unavailable(self):
+        # GIVEN
+        backend = FailoverBackend([FakeBackend('primary', fail=True)], max_failures=1, backoff=60)
+        # THEN
+        with self.assertRaises(BackendUnavailable):
+            backend.translate('ciao')
+        with self.assertRaises(BackendUnavailable):
+            backend.translate('ciao')
@@ -0,0 +1,76 @@
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import time
+import unittest2
+
+from translator.cache import TranslationCache
+
+
+class Test_cache(unittest2.TestCase):
+
+    def test_hit_and_miss(self):
+        # GIVEN
+        cache = TranslationCache(max_entries=10)
+        key = ('ciao', 'auto', 'en')
+        # WHEN
+        self.assertIsNone(cache.get(key))
+        cache.put(key, 'hello')
+        # THEN
+        self.assertEqual('hello', cache.get(key))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        # GIVEN
+        cache = TranslationCache(max_entries=2)
+        cache.put(('a', 'auto', 'en'), 'A')
+        cache.put(('b', 'auto', 'en'), 'B')
+        cache.get(('a', 'auto', 'en'))
+        # WHEN
+        cache.put(('c', 'auto', 'en'), 'C')
+        # THEN
+        self.assertIsNone(cache.get(('b', 'auto', 'en')))
+        self.assertEqual('A', cache.get(('a', 'auto', 'en')))
+        self.assertEqual('C', cache.get(('c', 'auto', 'en')))
+        self.assertEqual(1, cache.evictions)
+
+    def test_byte_cap(self):
+        # GIVEN
+        cache = TranslationCache(max_entries=10, max_bytes=10)
+        # WHEN
+        cache.put(('aaa', 'auto', 'en'), 'AAA')
+        cache.put(('bbb', 'auto', 'en'), 'BBB')
+        # THEN
+        self.assertEqual(1, len(cache))
+        self.assertEqual(6, cache.size)
+
+    def test_expired_entry_is_a_miss(self):
+        # GIVEN
+        cache = TranslationCache(max_entries=10, ttl=60)
+        cache.put(('a', 'auto', 'en'), 'A', ttl=0.01)
+        # WHEN
+        time.sleep(0.02)
+        # THEN
+        self.assertIsNone(cache.get(('a', 'auto', 'en')))
+        self.assertEqual(1, cache.expirations)
+
+    def test_disabled_cache(self):
+        cache = TranslationCache(max_entries=0)
+        cache.put(('a', 'auto', 'en'), 'A')
+        self.assertIsNone(cache.get(('a', 'auto', 'en')))
@@ -16,12 +16,24 @@
 # along with this program; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
 
+import os
+import shutil
+import socket
+import tempfile
+
 from b3.config import CfgConfigParser
+from mockito import times
+from mockito import verify
 from mockito import when
 from textwrap import dedent
 from tests import TranslatorTestCase
 from tests import logging_disabled
 from translator import TranslatorPlugin
+from translator.detector import LanguageDetector
+from translator.history import ChatHistory
+from translator.pool import WorkerPool
+from translator.ratelimit import RateLimiter
+from translator.store import TranslationStore
 
 
 class Test_commands(TranslatorTestCase):
@@ -44,6 +56,8 @@ class Test_commands(TranslatorTestCase):
             translate: reg
             translast: reg
             transauto: reg
+            transcache: reg
+            transstats: reg
             translang: reg
         """))
 
@@ -108,6 +122,57 @@ class Test_commands(TranslatorTestCase):
         # THEN
         self.assertListEqual(['Mensaje de prueba'], self.mike.message_history)
 
+    def test_cmd_translate_throttled(self):
+        # GIVEN
+        self.p.ratelimiter.clients.clear()
+        for i in range(self.p.settings['ratelimit_client_burst']):
+            self.mike.says("!translate Messaggio di prova %s" % i)
+        # WHEN
+        self.mike.clearMessageHistory()
+        self.mike.says("!translate Messaggio di prova")
+        # THEN
+        self.assertListEqual(['translation limit reached, try again later'], self.mike.message_history)
+
+    def test_cmd_translate_same_language(self):
+        # WHEN
+        self.mike.clearMessageHistory()
+        self.mike.says("!translate en*en Test message")
+        # THEN
+        self.assertListEqual(['nothing to translate'], self.mike.message_history)
+        self.assertEqual(1, self.p.skipfilter.skipped['language'])
+
+    def test_cmd_translate_chat_phrase(self):
+        # WHEN
+        self.mike.clearMessageHistory()
+        self.mike.says("!translate lol xD")
+        # THEN
+        self.assertListEqual(['nothing to translate'], self.mike.message_history)
+        self.assertEqual(1, self.p.skipfilter.skipped['phrase'])
+
+    def test_cmd_translate_known_phrase(self):
+        # GIVEN
+        self.p.translate = lambda *args: TranslatorPlugin.translate(self.p, *args)
+        # WHEN
+        self.mike.clearMessageHistory()
+        self.mike.says("!translate lag")
+        # THEN
+        self.assertListEqual(['lag: network lag'], self.mike.message_history)
+        self.assertEqual(0, self.p.skipfilter.total)
+        verify(self.p.backend, times(0)).translate('lag', 'it', 'en')
+
+    def test_cmd_translate_queue_full(self):
+        # GIVEN
+        self.p.pool = WorkerPool(workers=1, queue_size=1)
+        self.p.pool.submit(lambda: None)
+        self.p.ratelimiter = RateLimiter(command_rate=0.001, command_burst=1)
+        # WHEN
+        self.mike.clearMessageHistory()
+        self.mike.says("!translate Messaggio di prova")
+        # THEN
+        self.assertListEqual(['translation limit reached, try again later'], self.mike.message_history)
+        self.assertEqual(1, self.p.metrics.counter('queue.dropped'))
+        self.assertAlmostEqual(1, self.p.ratelimiter.state()['command'], places=2)
+
     ####################################################################################################################
     ##                                                                                                                ##
     ##  TEST CMD TRANSLAST                                                                                            ##
@@ -130,6 +195,56 @@ class Test_commands(TranslatorTestCase):
         # THEN
         self.assertListEqual(['Message de test'], self.mike.message_history)
 
+    def test_cmd_translast_with_client(self):
+        # GIVEN
+        when(self.p).translate('Messaggio di prova', 'auto', 'en').thenReturn('Test message')
+        self.bill.says('Messaggio di prova')
+        self.mike.says('Something else')
+        self.mike.clearMessageHistory()
+        # WHEN
+        self.mike.says("!translast bill")
+        # THEN
+        self.assertListEqual(['Test message'], self.mike.message_history)
+
+    def test_cmd_translast_with_client_and_target(self):
+        # GIVEN
+        when(self.p).translate('Messaggio di prova', 'auto', 'fr').thenReturn('Message de test')
+        self.bill.says('Messaggio di prova')
+        self.mike.says('Something else')
+        self.mike.clearMessageHistory()
+        # WHEN
+        self.mike.says("!translast bill fr")
+        # THEN
+        self.assertListEqual(['Message de test'], self.mike.message_history)
+
+    def test_cmd_translast_with_client_no_message(self):
+        # GIVEN
+        self.mike.says('Something else')
+        self.mike.clearMessageHistory()
+        # WHEN
+        self.mike.says("!translast bill")
+        # THEN
+        self.assertListEqual(['unable to translate, no last message found'], self.mike.message_history)
+
+    def test_cmd_translast_history_is_bounded(self):
+        # GIVEN
+        self.p.history = ChatHistory(2)
+        # WHEN
+        for i in range(5):
+            self.bill.says('Messaggio di prova %s' % i)
+        # THEN
+        self.assertEqual(2, len(self.p.history))
+
+    def test_send_translation_split(self):
+        # GIVEN
+        self.p.line_length = 20
+        self.mike.clearMessageHistory()
+        # WHEN
+        self.p.send_translation(self.mike, 'Messaggio di prova: This is a rather long test message')
+        # THEN
+        self.assertListEqual(['Messaggio di prova:', 'This is a rather', 'long test message'],
+                             self.mike.message_history)
+
     ####################################################################################################################
     ##                                                                                                                ##
     ##  TEST CMD TRANSAUTO                                                                                            ##
@@ -144,3 +259,205 @@ class Test_commands(TranslatorTestCase):
         self.bill.says('Messaggio di prova')
         # THEN
         self.assertListEqual(['Test message'], self.mike.message_history)
+
+    def test_cmd_transauto_skips_target_language(self):
+        # GIVEN
+        self.mike.says('!transauto on')
+        self.mike.clearMessageHistory()
+        # WHEN
+        self.bill.says('what are you doing there')
+        # THEN
+        self.assertListEqual([], self.mike.message_history)
+
+    def test_cmd_transauto_full_detection_runs_in_the_worker(self):
+        # GIVEN
+        calls = []
+        jobs = []
+        self.p.detector = LanguageDetector(lambda text: calls.append(text) or 'en')
+        self.p.skipfilter.detector = self.p.detector
+        self.p.run_async = lambda callback, func, args, kind='command', refund=None: jobs.append((callback, func, args))
+        self.mike.says('!transauto on')
+        self.mike.clearMessageHistory()
+        # WHEN
+        self.bill.says('xyzzy plugh frobnicate')
+        # THEN
+        self.assertListEqual([], calls)
+        self.assertEqual(1, len(jobs))
+        # WHEN
+        callback, func, args = jobs[0]
+        callback(func(*args))
+        # THEN
+        self.assertListEqual(['xyzzy plugh frobnicate'], calls)
+        self.assertListEqual([], self.mike.message_history)
+
+    def test_cmd_transauto_multiple_languages(self):
+        # GIVEN
+        with logging_disabled():
+            from b3.fake import FakeClient
+        joe = FakeClient(console=self.console, name="Joe", guid="joeguid", groupBits=2)
+        joe.connects("3")
+        when(self.p).translate('Messaggio di prova', 'auto', 'en').thenReturn('Test message')
+        when(self.p).translate('Messaggio di prova', 'auto', 'fr').thenReturn('Message de test')
+        self.mike.says('!transauto on en')
+        self.bill.says('!transauto on fr')
+        self.mike.clearMessageHistory()
+        self.bill.clearMessageHistory()
+        # WHEN
+        joe.says('Messaggio di prova')
+        # THEN
+        self.assertListEqual(['Test message'], self.mike.message_history)
+        self.assertListEqual(['Message de test'], self.bill.message_history)
+
+    def test_cmd_transauto_stored_translation_gives_token_back(self):
+        # GIVEN
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.p.store = TranslationStore(os.path.join(tmpdir, 'translator.db'))
+        self.addCleanup(self.p.store.close)
+        self.p.store.put(self.p.translation_key('Ciao a tutti ragazzi', 'auto', 'en'), 'Hello everyone guys')
+        when(self.p).translate('Ciao a tutti ragazzi', 'auto', 'en').thenReturn('Hello everyone guys')
+        self.p.ratelimiter = RateLimiter(auto_rate=0.001, auto_burst=1)
+        self.mike.says('!transauto on')
+        self.mike.clearMessageHistory()
+        # WHEN
+        self.bill.says('Ciao a tutti ragazzi')
+        self.bill.says('Ciao a tutti ragazzi')
+        # THEN
+        self.assertListEqual(['Hello everyone guys', 'Hello everyone guys'], self.mike.message_history)
+        self.assertEqual(0, self.p.ratelimiter.throttled['auto'])
+
+    def test_cmd_transauto_with_target(self):
+        # WHEN
+        self.mike.clearMessageHistory()
+        self.mike.says('!transauto on fr')
+        # THEN
+        self.assertListEqual(['Transauto: ON (French)'], self.mike.message_history)
+        self.assertDictEqual({'fr': set([self.mike])}, self.p.transauto)
+
+    def test_cmd_transauto_off(self):
+        # GIVEN
+        self.mike.says('!transauto on fr')
+        self.bill.says('!transauto on')
+        # WHEN
+        self.mike.says('!transauto off')
+        # THEN
+        self.assertDictEqual({'en': set([self.bill])}, self.p.transauto)
+        self.assertFalse(self.mike.isvar(self.p, 'transauto'))
+
+    def test_cmd_transauto_subscriber_removed_on_disconnect(self):
+        # GIVEN
+        self.mike.says('!transauto on fr')
+        # WHEN
+        self.mike.disconnects()
+        # THEN
+        self.assertDictEqual({}, self.p.transauto)
+
+    def test_cmd_transauto_invalid_target(self):
+        # WHEN
+        self.mike.clearMessageHistory()
+        self.mike.says('!transauto on xx')
+        # THEN
+        self.assertListEqual(['invalid target language specified, try !translang'], self.mike.message_history)
+        self.assertDictEqual({}, self.p.transauto)
+
+    ####################################################################################################################
+    ##                                                                                                                ##
+    ##  TEST CMD TRANSCACHE                                                                                           ##
+    ##                                                                                                                ##
+    ####################################################################################################################
+
+    def test_cmd_transcache(self):
+        # GIVEN
+        self.p.cache.put(self.p.translation_key('Messaggio di prova', 'it', 'en'), 'Test message')
+        # WHEN
+        self.mike.clearMessageHistory()
+        self.mike.says("!transcache")
+        # THEN
+        self.assertListEqual(['Translation cache: 1 entries (30 bytes), 0 hits, 0 misses, 0 evictions, 0 shared, 0.0 pct saved by normalization'],
+                             self.mike.message_history)
+
+    def test_cmd_transcache_clear(self):
+        # GIVEN
+        self.p.cache.put(self.p.translation_key('Messaggio di prova', 'it', 'en'), 'Test message')
+        # WHEN
+        self.mike.clearMessageHistory()
+        self.mike.says("!transcache clear")
+        # THEN
+        self.assertListEqual(['Translation cache: CLEARED'], self.mike.message_history)
+        self.assertEqual(0, len(self.p.cache))
+
+    def test_cmd_transstats(self):
+        # GIVEN
+        self.p.metrics.incr('requests.success', 3)
+        self.p.metrics.incr('requests.timeout')
+        self.p.metrics.observe('upstream.latency', 120.0)
+        # WHEN
+        self.mike.clearMessageHistory()
+        self.mike.says("!transstats")
+        # THEN
+        self.assertListEqual(['Requests: 3 ok, 0 empty, 0 http errors, 1 timeouts, 0 errors, 0 unavailable',
+                              'Latency: 120/120/120 ms (p50/p95/p99), cache hit ratio: 0.0 pct',
+                              'Queue: 0 pending (max 0), 0 lines to send, 0 dropped, 0 expired, 0 auto translations throttled'],
+                             self.mike.message_history)
+
+    def test_cmd_transstats_reset(self):
+        # GIVEN
+        self.p.metrics.incr('requests.success', 3)
+        # WHEN
+        self.mike.clearMessageHistory()
+        self.mike.says("!transstats reset")
+        # THEN
+        self.assertListEqual(['Translation statistics: RESET'], self.mike.message_history)
+        self.assertEqual(0, self.p.metrics.counter('requests.success'))
+
+    def test_voice_is_cached(self):
+        # GIVEN
+        when(self.p.backend).voice('good game', 'en').thenReturn('ID3 good game')
+        # WHEN
+        self.p.voice('good game', 'en')
+        audio = self.p.voice('good game', 'en')
+        # THEN
+        self.assertEqual('ID3 good game', audio)
+        verify(self.p.backend, times(1)).voice('good game', 'en')
+
+    def test_request_translation_metrics(self):
+        # GIVEN
+        when(self.p.backend).translate('Ciao a tutti', 'it', 'en').thenReturn('Hello everyone')
+        # WHEN
+        self.p.request_translation('Ciao a tutti', 'it', 'en')
+        # THEN
+        self.assertEqual(1, self.p.metrics.counter('requests.success'))
+        self.assertEqual(1, self.p.metrics.histogram('upstream.latency')['count'])
+
+    def test_failed_request_latency_is_recorded(self):
+        # GIVEN
+        when(self.p.backend).translate('Ciao a tutti', 'it', 'en').thenRaise(socket.timeout('timed out'))
+        # WHEN
+        self.assertRaises(socket.timeout, self.p.request_translation, 'Ciao a tutti', 'it', 'en')
+        # THEN
+        self.assertEqual(1, self.p.metrics.counter('requests.timeout'))
+        self.assertEqual(1, self.p.metrics.histogram('upstream.latency')['count'])
+
+    def test_startup_metrics(self):
+        # THEN
+        self.assertEqual(1, self.p.metrics.histogram('startup.onLoadConfig')['count'])
+        self.assertEqual(1, self.p.metrics.histogram('startup.onStartup')['count'])
+
+    ####################################################################################################################
+    ##                                                                                                                ##
+    ##  TEST BATCH TRANSLATION                                                                                        ##
+    ##                                                                                                                ##
+    ####################################################################################################################
+
+    def test_translate_batch(self):
+        # GIVEN
+        google = self.p.backend.backends[0][0]
+        when(google).request_json('Ciao a tutti\nBuona partita', 'auto', 'en', 0).thenReturn({
+            'sentences': [{'orig': 'Ciao a tutti\n', 'trans': 'Hello everyone\n'},
+                          {'orig': 'Buona partita', 'trans': 'Good game'}]})
+        # WHEN
+        translations = self.p.translate_batch(['Ciao a tutti', 'Buona partita', 'Ciao a tutti'], 'auto', 'en')
+        # THEN
+        self.assertListEqual(['Ciao a tutti: Hello everyone', 'Buona partita: Good game',
+                              'Ciao a tutti: Hello everyone'], translations)
+        self.assertEqual('Buona partita: Good game', self.p.cache.get(self.p.translation_key('Buona partita', 'auto', 'en')))
@@ -0,0 +1,122 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import sys
+import unittest2
+
+from translator.detector import LangDetect
+from translator.detector import LanguageDetector
+from translator.detector import detect_script
+from translator.detector import detect_stopwords
+
+
+class Test_detector(unittest2.TestCase):
+
+    def test_detect_script(self):
+        self.assertEqual('ru', detect_script(u'привет как дела'))
+        self.assertEqual('uk', detect_script(u'привіт як справи'))
+        self.assertEqual('el', detect_script(u'γεια σου'))
+        self.assertEqual('zh', detect_script(u'你好吗'))
+        self.assertEqual('ja', detect_script(u'こんにちは世界'))
+        self.assertEqual('ru', detect_script(u'привет как дела'.encode('utf-8')))
+
+    def test_detect_script_latin(self):
+        self.assertIsNone(detect_script(u'hello there'))
+        self.assertIsNone(detect_script(u'hello there мир'))
+        self.assertIsNone(detect_script(u'1234 !!'))
+
+    def test_detect_stopwords(self):
+        self.assertEqual('en', detect_stopwords(u'what are you doing there'))
+        self.assertEqual('it', detect_stopwords(u'ciao come stai'))
+        self.assertEqual('de', detect_stopwords(u'ich bin nicht da'))
+        self.assertEqual('fr', detect_stopwords(u"je ne sais pas"))
+
+    def test_detect_stopwords_undecided(self):
+        self.assertIsNone(detect_stopwords(u'xyzzy plugh'))
+        self.assertIsNone(detect_stopwords(u''))
+        # a single frequent word in a long sentence is not enough
+        self.assertIsNone(detect_stopwords(u'the qwerty asdfgh zxcvb poiuy lkjhg'))
+
+    def test_quick_detection_skips_fallback(self):
+        # GIVEN
+        calls = []
+        detector = LanguageDetector(lambda text: calls.append(text) or 'it')
+        # WHEN
+        lang = detector.detect(u'what are you doing')
+        # THEN
+        self.assertEqual('en', lang)
+        self.assertListEqual([], calls)
+        self.assertEqual(1, detector.quick)
+
+    def test_fallback(self):
+        # GIVEN
+        detector = LanguageDetector(lambda text: 'zh-cn')
+        # WHEN
+        lang = detector.detect(u'xyzzy plugh')
+        # THEN
+        self.assertEqual('zh', lang)
+        self.assertEqual(1, detector.fallbacks)
+
+    def test_fallback_error(self):
+        # GIVEN
+        def fallback(text):
+            raise ValueError('no features in text')
+        detector = LanguageDetector(fallback)
+        # THEN
+        self.assertIsNone(detector.detect(u'xyzzy'))
+        self.assertEqual(1, detector.unknown)
+
+    def test_fallback_disabled(self):
+        # GIVEN
+        calls = []
+        detector = LanguageDetector(lambda text: calls.append(text) or 'it')
+        # THEN
+        self.assertIsNone(detector.detect(u'xyzzy plugh', fallback=False))
+        self.assertListEqual([], calls)
+        self.assertEqual(0, detector.unknown)
+
+    def test_no_fallback(self):
+        self.assertIsNone(LanguageDetector().detect(u'xyzzy plugh'))
+
+    def test_langdetect_not_installed(self):
+        # GIVEN
+        fallback = LangDetect()
+        saved = sys.modules.get('langdetect')
+        sys.modules['langdetect'] = None
+        try:
+            # WHEN
+            lang = fallback(u'xyzzy plugh')
+        finally:
+            if saved is None:
+                del sys.modules['langdetect']
+            else:
+                sys.modules['langdetect'] = saved
+        # THEN
+        self.assertIsNone(lang)
+        self.assertFalse(fallback.available)
+
+    def test_langdetect_is_imported_lazily(self):
+        # GIVEN
+        fallback = LangDetect()
+        # THEN
+        self.assertIsNone(fallback.available)
+        # WHEN: the heuristics are enough
+        LanguageDetector(fallback).detect(u'what are you doing')
+        # THEN
+        self.assertIsNone(fallback.available)
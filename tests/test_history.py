@@ -0,0 +1,100 @@
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import unittest2
+
+from translator.history import ChatHistory
+
+
+class Test_history(unittest2.TestCase):
+
+    def test_empty(self):
+        # GIVEN
+        history = ChatHistory(3)
+        # THEN
+        self.assertEqual(0, len(history))
+        self.assertIsNone(history.last())
+        self.assertIsNone(history.last_from(1))
+        self.assertListEqual([], list(history))
+
+    def test_newest_first(self):
+        # GIVEN
+        history = ChatHistory(3)
+        # WHEN
+        history.add('one', 1)
+        history.add('two', 2)
+        # THEN
+        self.assertEqual(2, len(history))
+        self.assertEqual('two', history.last().text)
+        self.assertListEqual(['two', 'one'], [x.text for x in history])
+
+    def test_capacity_is_enforced(self):
+        # GIVEN
+        history = ChatHistory(3)
+        # WHEN
+        for i in range(5):
+            history.add('message %s' % i, i)
+        # THEN
+        self.assertEqual(3, len(history))
+        self.assertListEqual(['message 4', 'message 3', 'message 2'], [x.text for x in history])
+
+    def test_last_from_client(self):
+        # GIVEN
+        history = ChatHistory(5)
+        # WHEN
+        history.add('hello', 1)
+        history.add('ciao', 2)
+        history.add('hello again', 1)
+        # THEN
+        self.assertEqual('hello again', history.last_from(1).text)
+        self.assertEqual('ciao', history.last_from(2).text)
+        self.assertIsNone(history.last_from(3))
+
+    def test_evicted_messages_are_unindexed(self):
+        # GIVEN
+        history = ChatHistory(2)
+        history.add('hello', 1, 'red', True)
+        # WHEN
+        history.add('ciao', 2)
+        history.add('salut', 2)
+        # THEN
+        self.assertIsNone(history.last_from(1))
+        self.assertIsNone(history.last_team('red'))
+        self.assertEqual('salut', history.last_from(2).text)
+
+    def test_last_team(self):
+        # GIVEN
+        history = ChatHistory(5)
+        # WHEN
+        history.add('attack', 1, 'red', True)
+        history.add('hello all', 2, 'red', False)
+        history.add('defend', 3, 'blue', True)
+        # THEN
+        self.assertEqual('attack', history.last_team('red').text)
+        self.assertEqual('defend', history.last_team('blue').text)
+
+    def test_clear(self):
+        # GIVEN
+        history = ChatHistory(3)
+        history.add('hello', 1, 'red', True)
+        # WHEN
+        history.clear()
+        # THEN
+        self.assertEqual(0, len(history))
+        self.assertIsNone(history.last_from(1))
+        self.assertIsNone(history.last_team('red'))
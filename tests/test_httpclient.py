@@ -0,0 +1,109 @@
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import gzip
+import io
+import threading
+import unittest2
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from BaseHTTPServer import HTTPServer
+except ImportError:
+    from http.server import BaseHTTPRequestHandler
+    from http.server import HTTPServer
+
+from translator.httpclient import HttpClient
+from translator.httpclient import HttpError
+from translator.httpclient import ResponseTooLarge
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path.startswith('/error'):
+            body = b'rate limited'
+            self.send_response(429)
+        else:
+            body = self.path.encode('utf-8')
+            self.send_response(200)
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            buf = io.BytesIO()
+            with gzip.GzipFile(fileobj=buf, mode='wb') as f:
+                f.write(body)
+            body = buf.getvalue()
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Test_httpclient(unittest2.TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), FakeHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.client = HttpClient('127.0.0.1', self.server.server_address[1], secure=False)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_get_decompresses_gzip(self):
+        self.assertEqual(b'/translate?q=ciao', self.client.get('/translate', 'q=ciao'))
+
+    def test_connection_is_reused(self):
+        # WHEN
+        for i in range(5):
+            self.client.get('/translate', 'q=%s' % i)
+        # THEN
+        self.assertEqual(5, self.client.requests)
+        self.assertEqual(1, self.client.connections)
+
+    def test_error_status_raises(self):
+        with self.assertRaises(HttpError) as ctx:
+            self.client.get('/error')
+        self.assertEqual(429, ctx.exception.status)
+        # the connection is still usable
+        self.assertEqual(b'/ok', self.client.get('/ok'))
+        self.assertEqual(1, self.client.connections)
+
+    def test_response_size_is_capped(self):
+        # GIVEN
+        client = HttpClient('127.0.0.1', self.server.server_address[1], secure=False, max_response_size=64)
+        # THEN
+        with self.assertRaises(ResponseTooLarge):
+            client.get('/translate', 'q=%s' % ('x' * 200))
+        self.assertEqual(b'/ok', client.get('/ok'))
+        client.close()
+
+    def test_decompressed_size_is_capped(self):
+        # GIVEN: the body compresses well below the limit
+        client = HttpClient('127.0.0.1', self.server.server_address[1], secure=False, max_response_size=100)
+        # THEN
+        with self.assertRaises(ResponseTooLarge):
+            client.get('/translate', 'q=%s' % ('x' * 1000))
+        client.close()
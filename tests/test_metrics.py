@@ -0,0 +1,98 @@
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import socket
+import unittest2
+
+from translator.backends import BackendUnavailable
+from translator.httpclient import HttpError
+from translator.metrics import Histogram
+from translator.metrics import Metrics
+from translator.metrics import outcome
+
+
+class Test_metrics(unittest2.TestCase):
+
+    def test_outcome(self):
+        self.assertEqual('success', outcome(result='ciao'))
+        self.assertEqual('empty', outcome(result=None))
+        self.assertEqual('http_error', outcome(HttpError(429, 'Too Many Requests')))
+        self.assertEqual('timeout', outcome(socket.timeout('timed out')))
+        self.assertEqual('timeout', outcome(IOError('The read operation timed out')))
+        self.assertEqual('error', outcome(ValueError('invalid JSON')))
+        self.assertEqual('timeout', outcome(BackendUnavailable('google: timed out', [socket.timeout('timed out')])))
+        self.assertEqual('unavailable', outcome(BackendUnavailable('google: circuit open')))
+
+    def test_histogram_percentiles(self):
+        # GIVEN
+        histogram = Histogram(window=100)
+        # WHEN
+        for value in range(1, 101):
+            histogram.add(value)
+        # THEN
+        summary = histogram.summary()
+        self.assertEqual(100, summary['count'])
+        self.assertEqual(50, summary['p50'])
+        self.assertEqual(95, summary['p95'])
+        self.assertEqual(99, summary['p99'])
+        self.assertEqual(100, summary['max'])
+        self.assertEqual(50.5, summary['mean'])
+
+    def test_histogram_window(self):
+        # GIVEN
+        histogram = Histogram(window=10)
+        # WHEN
+        for value in range(100):
+            histogram.add(value)
+        # THEN
+        self.assertEqual(100, histogram.count)
+        self.assertEqual(90, histogram.percentile(0))
+
+    def test_counters(self):
+        # GIVEN
+        metrics = Metrics()
+        # WHEN
+        metrics.incr('requests.success')
+        metrics.incr('requests.success', 2)
+        # THEN
+        self.assertEqual(3, metrics.counter('requests.success'))
+        self.assertEqual(0, metrics.counter('requests.timeout'))
+
+    def test_timer(self):
+        # GIVEN
+        metrics = Metrics()
+        # WHEN
+        with self.assertRaises(ValueError):
+            with metrics.timer('command.translate'):
+                raise ValueError('failed')
+        # THEN
+        self.assertEqual(1, metrics.histogram('command.translate')['count'])
+        self.assertEqual(0, metrics.histogram('command.translast')['count'])
+
+    def test_snapshot_and_reset(self):
+        # GIVEN
+        metrics = Metrics()
+        metrics.incr('auto.throttled')
+        metrics.observe('upstream.latency', 120.0)
+        # WHEN
+        snapshot = metrics.snapshot()
+        metrics.reset()
+        # THEN
+        self.assertEqual({'auto.throttled': 1}, snapshot['counters'])
+        self.assertEqual(120.0, snapshot['histograms']['upstream.latency']['p99'])
+        self.assertEqual({}, metrics.snapshot()['counters'])
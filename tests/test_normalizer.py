@@ -0,0 +1,65 @@
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import unittest2
+
+from translator.normalizer import Normalizer
+
+
+class Test_normalizer(unittest2.TestCase):
+
+    def test_variants_share_the_key(self):
+        # GIVEN
+        normalizer = Normalizer()
+        # THEN
+        variants = ['hello there', '^1Hello ^7there', 'HELLO   there ', ' hello there']
+        self.assertSetEqual({'hello there'}, set(normalizer.key(x) for x in variants))
+        self.assertEqual(normalizer.key('hellooo'), normalizer.key('HELLOOOOOO'))
+        self.assertEqual(normalizer.key('where are you?'), normalizer.key('Where are you???'))
+        self.assertEqual(normalizer.key('wait...'), normalizer.key('wait.....'))
+
+    def test_clean_keeps_case(self):
+        self.assertEqual('Helloo there!', Normalizer().clean('^1Hellooooo   ^7there!!!'))
+
+    def test_doubled_letters_are_kept(self):
+        self.assertEqual('good cool', Normalizer().clean('goooood cool'))
+
+    def test_rules(self):
+        # GIVEN
+        normalizer = Normalizer(rules=('whitespace',))
+        # THEN
+        self.assertEqual('^1Hellooo there!!', normalizer.key(' ^1Hellooo   there!! '))
+        with self.assertRaises(ValueError):
+            Normalizer(rules=('whitespace', 'unknown'))
+
+    def test_for_game(self):
+        self.assertEqual('^1hello', Normalizer.for_game('bf3').key('^1Hello'))
+        self.assertEqual('hello', Normalizer.for_game('iourt42').key('^1Hello'))
+
+    def test_account(self):
+        # GIVEN
+        normalizer = Normalizer()
+        # WHEN
+        normalizer.account('hello', False)
+        normalizer.account('Hellooo', True)
+        normalizer.account('Hellooo', True)
+        normalizer.account('hello!!', True)
+        # THEN
+        self.assertEqual(4, normalizer.requests)
+        self.assertEqual(2, normalizer.saved)
+        self.assertEqual(0.5, normalizer.ratio)
@@ -0,0 +1,104 @@
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import threading
+import time
+import unittest2
+
+from translator.output import MessagePacer
+from translator.output import split_message
+
+
+class Test_output(unittest2.TestCase):
+
+    def test_split_short_message(self):
+        self.assertListEqual(['ciao: hello'], split_message('ciao: hello', 80))
+
+    def test_split_at_word_boundaries(self):
+        self.assertListEqual(['one two three', 'four five six', 'seven'],
+                             split_message('one two three four five six seven', 14))
+
+    def test_split_lines(self):
+        self.assertListEqual(['ciao: hello', 'interjection', 'hello: ciao, salve'],
+                             split_message('ciao: hello\n\ninterjection\nhello: ciao, salve\n', 80))
+
+    def test_split_long_word(self):
+        self.assertListEqual(['a' * 10, 'a' * 10, 'aaaaa b'], split_message('a' * 25 + ' b', 10))
+
+    def test_split_carries_color(self):
+        self.assertListEqual(['^7one ^3two', '^3three four'], split_message('^7one ^3two three four', 12))
+
+    def test_pacer_inline(self):
+        # GIVEN
+        sent = []
+        pacer = MessagePacer(rate=0)
+        # WHEN
+        pacer.put('mike', sent.append, ['one', 'two'])
+        # THEN
+        self.assertListEqual(['one', 'two'], sent)
+        self.assertEqual(2, pacer.sent)
+
+    def test_pacer_round_robin(self):
+        # GIVEN
+        sent = []
+        done = threading.Event()
+        pacer = MessagePacer(rate=200)
+
+        def send(chunk):
+            sent.append(chunk)
+            if len(sent) == 4:
+                done.set()
+
+        # WHEN
+        pacer.put('mike', send, ['m1', 'm2', 'm3'])
+        pacer.put('bill', send, ['b1'])
+        done.wait(5)
+        pacer.stop()
+        # THEN: bill doesn't wait for all the messages of mike
+        self.assertListEqual(['m1', 'm2', 'm3'], [x for x in sent if x[0] == 'm'])
+        self.assertLess(sent.index('b1'), 3)
+
+    def test_pacer_rate(self):
+        # GIVEN
+        sent = []
+        pacer = MessagePacer(rate=20)
+        # WHEN
+        pacer.put(None, sent.append, ['a', 'b', 'c', 'd', 'e', 'f'])
+        time.sleep(0.12)
+        pacer.stop()
+        # THEN: 20 lines per second at most
+        self.assertLess(len(sent), 6)
+
+    def test_pacer_queue_size(self):
+        # GIVEN
+        pacer = MessagePacer(rate=0.01, queue_size=2)
+        # WHEN
+        pacer.put('mike', lambda chunk: None, ['1', '2', '3', '4', '5'])
+        # THEN
+        self.assertGreaterEqual(pacer.dropped, 2)
+        pacer.stop()
+
+    def test_pacer_send_error(self):
+        # GIVEN
+        def send(chunk):
+            raise IOError('client disconnected')
+        pacer = MessagePacer(rate=0)
+        # WHEN
+        pacer.put('mike', send, ['one'])
+        # THEN
+        self.assertEqual(1, pacer.dropped)
@@ -0,0 +1,89 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import os
+import shutil
+import tempfile
+import unittest2
+
+from textwrap import dedent
+from translator.phrasebook import PhraseBook
+
+PHRASE_FILE = os.path.join(os.path.dirname(__file__), '..', 'extplugins', 'translator', 'conf', 'phrases.ini')
+
+
+class Test_phrasebook(unittest2.TestCase):
+
+    def test_add_and_get(self):
+        # GIVEN
+        phrases = PhraseBook()
+        # WHEN
+        phrases.add('Nice shot', 'it', 'bel colpo')
+        phrases.add('nice shot', 'fr', 'joli tir')
+        phrases.add('good game', 'fr', 'bonne partie')
+        # THEN
+        self.assertEqual(2, len(phrases))
+        self.assertListEqual(['it', 'fr'], phrases.languages)
+        self.assertEqual('bel colpo', phrases.get('nice shot', 'it'))
+        self.assertEqual('joli tir', phrases.get('  NICE   shot!! ', 'fr'))
+        self.assertIsNone(phrases.get('good game', 'it'))
+        self.assertIsNone(phrases.get('nice shot', 'de'))
+        self.assertIsNone(phrases.get('nice', 'it'))
+
+    def test_lookup_counts(self):
+        # GIVEN
+        phrases = PhraseBook()
+        phrases.add('nice shot', 'it', 'bel colpo')
+        # WHEN
+        phrases.lookup('nice shot', 'it')
+        phrases.lookup('nice shot', 'fr')
+        # THEN
+        self.assertEqual(1, phrases.hits)
+        self.assertEqual(1, phrases.misses)
+
+    def test_load(self):
+        # GIVEN
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'phrases.ini')
+            with open(path, 'w') as f:
+                f.write(dedent(r"""
+                    [it]
+                    good game: bella partita
+                    [fr]
+                    good game: bonne partie
+                """))
+            phrases = PhraseBook()
+            phrases.load(path)
+        finally:
+            shutil.rmtree(tmpdir)
+        # THEN
+        self.assertEqual(1, len(phrases))
+        self.assertEqual('bonne partie', phrases.get('Good Game', 'fr'))
+
+    def test_bundled_phrases(self):
+        # GIVEN
+        phrases = PhraseBook()
+        # WHEN
+        phrases.load(PHRASE_FILE)
+        # THEN
+        self.assertEqual('bel colpo', phrases.get('nice shot', 'it'))
+        self.assertEqual('sorry', phrases.get(u'Désolé', 'en'))
+        self.assertEqual('network lag', phrases.get('lag', 'en'))
+        self.assertEqual('bella partita, ben giocato', phrases.get('GG WP!', 'it'))
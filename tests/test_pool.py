@@ -0,0 +1,153 @@
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import threading
+import time
+import unittest2
+
+from translator.pool import WorkerPool
+
+
+class Test_pool(unittest2.TestCase):
+
+    def test_submit_delivers_result_to_callback(self):
+        # GIVEN
+        done = threading.Event()
+        results = []
+        pool = WorkerPool(workers=2, queue_size=4)
+        pool.start()
+        # WHEN
+        pool.submit(lambda x: x.upper(), ('hello',), lambda r: (results.append(r), done.set()))
+        done.wait(5)
+        pool.stop(timeout=5)
+        # THEN
+        self.assertListEqual(['HELLO'], results)
+
+    def test_drop_new_when_queue_is_full(self):
+        # GIVEN
+        pool = WorkerPool(workers=1, queue_size=1, policy='drop_new')
+        # WHEN (workers not started: the queue fills up)
+        self.assertTrue(pool.submit(lambda: 1))
+        self.assertFalse(pool.submit(lambda: 2))
+        # THEN
+        self.assertEqual(1, pool.dropped)
+        self.assertEqual(1, pool.queue.get_nowait().func())
+
+    def test_drop_oldest_when_queue_is_full(self):
+        # GIVEN
+        results = []
+        pool = WorkerPool(workers=1, queue_size=1, policy='drop_oldest')
+        # WHEN
+        self.assertTrue(pool.submit(lambda: 1, (), results.append))
+        self.assertTrue(pool.submit(lambda: 2))
+        # THEN
+        self.assertEqual(1, pool.dropped)
+        self.assertEqual(2, pool.queue.get_nowait().func())
+        self.assertListEqual([None], results)
+
+    def test_jobs_are_served_by_priority(self):
+        # GIVEN
+        pool = WorkerPool(workers=1, queue_size=4)
+        # WHEN
+        pool.submit(lambda: 'auto 1', priority=1)
+        pool.submit(lambda: 'auto 2', priority=1)
+        pool.submit(lambda: 'command', priority=0)
+        # THEN
+        self.assertListEqual(['command', 'auto 1', 'auto 2'], [pool.queue.get_nowait().func() for _ in range(3)])
+
+    def test_lower_priority_jobs_are_shed_first(self):
+        # GIVEN
+        pool = WorkerPool(workers=1, queue_size=2, policy='drop_new')
+        pool.submit(lambda: 'auto 1', priority=1)
+        pool.submit(lambda: 'auto 2', priority=1)
+        # WHEN
+        self.assertTrue(pool.submit(lambda: 'command', priority=0))
+        self.assertFalse(pool.submit(lambda: 'auto 3', priority=1))
+        # THEN
+        self.assertEqual(2, pool.dropped)
+        self.assertListEqual(['command', 'auto 2'], [pool.queue.get_nowait().func() for _ in range(2)])
+
+    def test_expired_jobs_are_discarded(self):
+        # GIVEN
+        done = threading.Event()
+        results = []
+        pool = WorkerPool(workers=1, queue_size=4)
+        pool.submit(lambda: 'stale', (), results.append, priority=1, deadline=time.time() - 1)
+        pool.submit(lambda: 'fresh', (), lambda r: (results.append(r), done.set()), priority=1, deadline=time.time() + 60)
+        # WHEN
+        pool.start()
+        done.wait(5)
+        pool.stop(timeout=5)
+        # THEN
+        self.assertListEqual(['fresh'], results)
+        self.assertEqual(1, pool.expired)
+
+    def test_error_handler_is_invoked(self):
+        # GIVEN
+        done = threading.Event()
+        errors = []
+        pool = WorkerPool(workers=1, on_error=lambda job, e: (errors.append(e), done.set()))
+        pool.start()
+        # WHEN
+        pool.submit(lambda: 1 / 0)
+        done.wait(5)
+        pool.stop(timeout=5)
+        # THEN
+        self.assertEqual(1, len(errors))
+        self.assertIsInstance(errors[0], ZeroDivisionError)
+
+    def test_callback_error_is_not_reported_as_job_error(self):
+        # GIVEN
+        done = threading.Event()
+        calls = []
+        errors = []
+        callback_errors = []
+        pool = WorkerPool(workers=1, on_error=lambda job, e: errors.append(e),
+                          on_callback_error=lambda job, e: (callback_errors.append(e), done.set()))
+        pool.start()
+        # WHEN
+        pool.submit(lambda: 'hello', (), lambda r: (calls.append(r), 1 / 0))
+        done.wait(5)
+        pool.stop(timeout=5)
+        # THEN
+        self.assertListEqual(['hello'], calls)
+        self.assertListEqual([], errors)
+        self.assertEqual(1, len(callback_errors))
+        self.assertIsInstance(callback_errors[0], ZeroDivisionError)
+        self.assertEqual(1, pool.completed)
+
+    def test_worker_survives_error_handler_failure(self):
+        # GIVEN
+        done = threading.Event()
+        results = []
+        callback_errors = []
+
+        def on_error(job, e):
+            raise IOError('could not notify the failure')
+
+        pool = WorkerPool(workers=1, on_error=on_error, on_callback_error=lambda job, e: callback_errors.append(e))
+        pool.start()
+        # WHEN
+        pool.submit(lambda: 1 / 0)
+        pool.submit(lambda: 'hello', (), lambda r: (results.append(r), done.set()))
+        done.wait(5)
+        pool.stop(timeout=5)
+        # THEN
+        self.assertListEqual(['hello'], results)
+        self.assertEqual(1, len(callback_errors))
+        self.assertIsInstance(callback_errors[0], IOError)
@@ -0,0 +1,71 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import unittest2
+
+from translator.detector import LanguageDetector
+from translator.prefilter import SkipFilter
+
+
+class Test_prefilter(unittest2.TestCase):
+
+    def setUp(self):
+        self.filter = SkipFilter(LanguageDetector())
+
+    def test_classify_text(self):
+        self.assertIsNone(self.filter.classify('where are the flags'))
+        self.assertIsNone(self.filter.classify('gg well played'))
+        self.assertIsNone(self.filter.classify(u'ciao a tutti :)'))
+
+    def test_classify_commands(self):
+        self.assertEqual('command', self.filter.classify('!help'))
+        self.assertEqual('command', self.filter.classify('/kill'))
+
+    def test_classify_phrases(self):
+        self.assertEqual('phrase', self.filter.classify('ggwp'))
+        self.assertEqual('phrase', self.filter.classify('LOL!!'))
+        self.assertEqual('phrase', self.filter.classify('hahahaha xD'))
+        self.assertEqual('phrase', self.filter.classify('jajajaja'))
+
+    def test_classify_noise(self):
+        self.assertEqual('noise', self.filter.classify(':) :D <3'))
+        self.assertEqual('noise', self.filter.classify('12 - 4'))
+        self.assertEqual('noise', self.filter.classify('^^ 100 :P kills'))
+        self.assertEqual('noise', self.filter.classify('   '))
+
+    def test_check_same_language(self):
+        self.assertEqual('language', self.filter.check('where are the flags', 'auto', 'en'))
+        self.assertEqual('language', self.filter.check('xyzzy plugh', 'en', 'en'))
+        self.assertEqual('language', self.filter.check('xyzzy plugh', 'auto', 'en-EN', 'en'))
+        self.assertIsNone(self.filter.check('where are the flags', 'auto', 'it'))
+        self.assertIsNone(self.filter.check('xyzzy plugh', 'auto', 'en'))
+
+    def test_check_uses_given_language(self):
+        # GIVEN: the message has already been detected as unknown
+        self.assertIsNone(self.filter.check('where are the flags', 'auto', 'en', ''))
+
+    def test_check_counts_skipped(self):
+        # WHEN
+        self.filter.check('lol', 'auto', 'en')
+        self.filter.check('!help', 'auto', 'en')
+        self.filter.check('where are the flags', 'auto', 'en')
+        self.filter.check('where are the flags', 'auto', 'it')
+        # THEN
+        self.assertDictEqual({'language': 1, 'phrase': 1, 'noise': 0, 'command': 1}, self.filter.skipped)
+        self.assertEqual(3, self.filter.total)
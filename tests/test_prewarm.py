@@ -0,0 +1,129 @@
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import imp
+import os
+import shutil
+import tempfile
+import unittest2
+
+from translator.prefilter import is_chat
+from translator.store import TranslationStore
+
+tool = imp.load_source('prewarm', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools', 'prewarm.py'))
+chat_messages = tool.chat_messages
+main = tool.main
+prewarm = tool.prewarm
+top_phrases = tool.top_phrases
+
+
+class FakeBackend(object):
+
+    def __init__(self, batch=True):
+        self.batch = batch
+        self.requests = 0
+
+    def translate(self, text, from_lang='auto', to_lang='en'):
+        self.requests += 1
+        return '%s: [%s] %s' % (text, to_lang, text)
+
+    def translate_batch(self, texts, from_lang='auto', to_lang='en'):
+        self.requests += 1
+        return ['[%s] %s' % (to_lang, text) for text in texts] if self.batch else None
+
+
+class Test_prewarm(unittest2.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'translator.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_is_chat(self):
+        self.assertTrue(is_chat('ciao a tutti'))
+        self.assertFalse(is_chat('ciao'))
+        self.assertFalse(is_chat('!translate ciao a tutti'))
+        self.assertFalse(is_chat('', min_length=0))
+
+    def test_chat_messages(self):
+        # GIVEN
+        lines = [
+            '  0:12 ClientConnect: 2\n',
+            '  0:15 say: 2 Mike: ciao a tutti\n',
+            '  0:16 sayteam: 3 Bill: attenti: cecchino a destra\n',
+            '  0:17 say: 2 Mike: ok\n',
+            '  0:18 say: 2 Mike: !translast it\n',
+            '12:34 say;0123456789abcdef;4;Bob;\x15bonjour tout le monde\n',
+            '12:35 Kill;0123456789abcdef;4;axis;Bob\n',
+        ]
+        # THEN
+        self.assertListEqual(['ciao a tutti', 'attenti: cecchino a destra', 'bonjour tout le monde'], list(chat_messages(lines)))
+
+    def test_top_phrases(self):
+        # GIVEN
+        messages = ['gg ciao a tutti'] * 3 + ['Ciao a tuttiii!!!'] * 2 + ['come va?'] * 2 + ['bonjour']
+        # WHEN
+        phrases = top_phrases(messages, count=2)
+        # THEN
+        self.assertListEqual([('gg ciao a tutti', 3), ('Ciao a tuttii!', 2)], phrases)
+
+    def test_top_phrases_bounded(self):
+        # GIVEN
+        messages = ['frequent message'] * 30 + ['rare message %s' % i for i in range(100)]
+        # WHEN
+        phrases = top_phrases(messages, count=1, capacity=5)
+        # THEN
+        self.assertEqual('frequent message', phrases[0][0])
+        # the counters are decremented whenever no room is left for a new message
+        self.assertLess(phrases[0][1], 30)
+
+    def test_prewarm(self):
+        # GIVEN
+        store = TranslationStore(self.path)
+        backend = FakeBackend()
+        # WHEN
+        stored = prewarm(['ciao a tutti', 'come state?', 'lol xD'], backend, store, ['en', 'fr'], delay=0)
+        # THEN
+        self.assertEqual(4, stored)
+        self.assertEqual(2, backend.requests)
+        self.assertEqual('come state?: [fr] come state?', store.get(('come state?', 'auto', 'fr')))
+        self.assertIsNone(store.get(('lol xd', 'auto', 'en')))
+        store.close()
+
+    def test_prewarm_skips_stored_translations(self):
+        # GIVEN
+        store = TranslationStore(self.path)
+        store.put(('ciao a tutti', 'auto', 'en'), 'ciao a tutti: hello everyone')
+        backend = FakeBackend(batch=False)
+        # WHEN
+        stored = prewarm(['Ciao a tutti', 'come state?'], backend, store, ['en'], delay=0)
+        # THEN
+        self.assertEqual(1, stored)
+        self.assertEqual(1, backend.requests)
+        self.assertEqual('ciao a tutti: hello everyone', store.get(('ciao a tutti', 'auto', 'en')))
+        store.close()
+
+    def test_main_dry_run(self):
+        # GIVEN
+        log = os.path.join(self.tmpdir, 'games.log')
+        with open(log, 'w') as f:
+            f.write('  0:15 say: 2 Mike: ciao a tutti\n' * 2)
+        # THEN
+        self.assertEqual(0, main([log, '--cache-file', self.path, '--dry-run']))
@@ -0,0 +1,101 @@
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import time
+import unittest2
+
+from translator.ratelimit import RateLimiter
+from translator.ratelimit import Refund
+from translator.ratelimit import TokenBucket
+
+
+class Test_ratelimit(unittest2.TestCase):
+
+    def test_token_bucket(self):
+        # GIVEN
+        bucket = TokenBucket(rate=100, capacity=2)
+        # THEN
+        self.assertTrue(bucket.consume())
+        self.assertTrue(bucket.consume())
+        self.assertFalse(bucket.consume())
+        time.sleep(0.02)
+        self.assertTrue(bucket.consume())
+
+    def test_client_budget_is_separate(self):
+        # GIVEN
+        limiter = RateLimiter(global_rate=0.001, global_burst=10, client_rate=0.001, client_burst=1)
+        # THEN
+        self.assertTrue(limiter.acquire('auto', 1))
+        self.assertFalse(limiter.acquire('auto', 1))
+        self.assertTrue(limiter.acquire('auto', 2))
+        self.assertEqual(1, limiter.throttled['client'])
+
+    def test_kind_budgets_are_separate(self):
+        # GIVEN
+        limiter = RateLimiter(auto_rate=0.001, auto_burst=1, command_rate=0.001, command_burst=1)
+        # THEN
+        self.assertTrue(limiter.acquire('auto'))
+        self.assertFalse(limiter.acquire('auto'))
+        self.assertTrue(limiter.acquire('command'))
+        self.assertEqual(1, limiter.throttled['auto'])
+
+    def test_throttled_request_does_not_consume_tokens(self):
+        # GIVEN
+        limiter = RateLimiter(global_rate=0.001, global_burst=2, command_rate=0.001, command_burst=1)
+        limiter.acquire('command')
+        # WHEN
+        self.assertFalse(limiter.acquire('command'))
+        # THEN
+        self.assertAlmostEqual(1, limiter.state()['global'], places=2)
+
+    def test_upstream_flag(self):
+        # GIVEN
+        limiter = RateLimiter(global_rate=0.001, global_burst=1, client_rate=0.001, client_burst=5)
+        # WHEN
+        self.assertTrue(limiter.acquire(None, 1, upstream=False))
+        # THEN
+        self.assertAlmostEqual(1, limiter.state()['global'], places=2)
+        self.assertAlmostEqual(4, limiter.state(1)['client'], places=2)
+
+    def test_release(self):
+        # GIVEN
+        limiter = RateLimiter(global_rate=0.001, global_burst=1, auto_rate=0.001, auto_burst=1,
+                              client_rate=0.001, client_burst=1)
+        limiter.acquire('auto', 1)
+        # WHEN
+        limiter.release('auto', 1)
+        # THEN
+        self.assertTrue(limiter.acquire('auto', 1))
+
+    def test_refund_once_no_request_is_sent(self):
+        # GIVEN
+        limiter = RateLimiter(global_rate=0.001, global_burst=3, auto_rate=0.001, auto_burst=1)
+        limiter.acquire('auto', upstream=False)
+        limiter.acquire()
+        limiter.acquire()
+        line = Refund(limiter, 2, 'auto', upstream=False)
+        # WHEN
+        Refund(limiter, then=line)()
+        # THEN
+        self.assertAlmostEqual(2, limiter.state()['global'], places=2)
+        self.assertAlmostEqual(0, limiter.state()['auto'], places=2)
+        # WHEN
+        Refund(limiter, then=line)()
+        # THEN
+        self.assertAlmostEqual(3, limiter.state()['global'], places=2)
+        self.assertAlmostEqual(1, limiter.state()['auto'], places=2)
@@ -0,0 +1,45 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import unittest2
+
+from translator.sanitizer import Sanitizer
+
+
+class Test_sanitizer(unittest2.TestCase):
+
+    def setUp(self):
+        self.sanitize = Sanitizer()
+
+    def test_color_codes_and_tags(self):
+        self.assertEqual(u'hello world', self.sanitize(u'^1hello <b>world</b>^7'))
+        self.assertEqual(u'', self.sanitize(u'^<i>1'))
+        self.assertEqual(u'^1', self.sanitize(u'^^11'))
+
+    def test_replacements(self):
+        self.assertEqual(u"Gruesse ''ss'' 5euro 100pc 3dollar", self.sanitize(u'Grüße "ß" 5€ 100% 3$'))
+        self.assertEqual(u'ca va tres bien', self.sanitize(u'ça va très bien'))
+
+    def test_byte_strings(self):
+        self.assertEqual('Gruesse 5euro', self.sanitize(u'^1Grüße <b>5€</b>'.encode('utf-8')))
+        self.assertIsInstance(self.sanitize(b'hello'), bytes)
+
+    def test_game_rules(self):
+        self.assertEqual(u'^1hello', Sanitizer.for_game('bf3')(u'^1hello'))
+        self.assertEqual(u'hello', Sanitizer.for_game('iourt42')(u'^1hello'))
@@ -0,0 +1,110 @@
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import threading
+import unittest2
+
+from translator.singleflight import SingleFlight
+
+
+class Test_singleflight(unittest2.TestCase):
+
+    def test_single_call(self):
+        # GIVEN
+        flights = SingleFlight()
+        # THEN
+        self.assertEqual(3, flights.do('key', lambda x, y: x + y, 1, 2))
+        self.assertFalse(flights.in_flight('key'))
+        self.assertEqual(1, flights.calls)
+
+    def test_concurrent_calls_are_coalesced(self):
+        # GIVEN
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def translate(text):
+            calls.append(text)
+            started.set()
+            release.wait(5)
+            return text.upper()
+
+        def request():
+            results.append(flights.do('ciao', translate, 'ciao'))
+
+        # WHEN
+        leader = threading.Thread(target=request)
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=request) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        while flights.shared < 3:
+            release.wait(0.01)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+        # THEN
+        self.assertListEqual(['ciao'], calls)
+        self.assertListEqual(['CIAO'] * 4, results)
+        self.assertEqual(3, flights.shared)
+
+    def test_error_is_shared(self):
+        # GIVEN
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def translate():
+            started.set()
+            release.wait(5)
+            raise IOError('service unavailable')
+
+        def request():
+            try:
+                flights.do('ciao', translate)
+            except IOError as e:
+                errors.append(e)
+
+        # WHEN
+        leader = threading.Thread(target=request)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=request)
+        follower.start()
+        while not flights.shared:
+            release.wait(0.01)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+        # THEN
+        self.assertEqual(2, len(errors))
+        self.assertFalse(flights.in_flight('ciao'))
+
+    def test_different_keys_are_not_coalesced(self):
+        # GIVEN
+        flights = SingleFlight()
+        # WHEN
+        flights.do('a', lambda: 1)
+        flights.do('b', lambda: 2)
+        # THEN
+        self.assertEqual(2, flights.calls)
+        self.assertEqual(0, flights.shared)
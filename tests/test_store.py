@@ -0,0 +1,87 @@
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import os
+import shutil
+import tempfile
+import unittest2
+
+from translator.store import TranslationStore
+
+
+class Test_store(unittest2.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'translator.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_translations_are_written_in_batches(self):
+        # GIVEN
+        store = TranslationStore(self.path, batch_size=2)
+        # WHEN
+        store.put(('ciao', 'auto', 'en'), 'hello')
+        # THEN
+        self.assertEqual(1, len(store._pending))
+        store.put(('grazie', 'auto', 'en'), 'thanks')
+        self.assertEqual(0, len(store._pending))
+        store.close()
+
+    def test_translations_survive_restart(self):
+        # GIVEN
+        store = TranslationStore(self.path, batch_size=10)
+        store.put(('ciao', 'auto', 'en'), 'hello')
+        store.close()
+        # WHEN
+        store = TranslationStore(self.path)
+        # THEN
+        self.assertEqual('hello', store.get(('ciao', 'auto', 'en')))
+        self.assertIsNone(store.get(('ciao', 'auto', 'fr')))
+        self.assertEqual(1, store.hits)
+        self.assertEqual(1, store.misses)
+        store.close()
+
+    def test_compact_keeps_most_recent_translations(self):
+        # GIVEN
+        store = TranslationStore(self.path, max_entries=1)
+        store.put(('ciao', 'auto', 'en'), 'hello')
+        store.flush()
+        store.connection.execute('UPDATE translations SET created = created - 10')
+        store.put(('grazie', 'auto', 'en'), 'thanks')
+        # WHEN
+        removed = store.compact()
+        # THEN
+        self.assertEqual(1, removed)
+        self.assertEqual(1, store.count())
+        self.assertEqual('thanks', store.get(('grazie', 'auto', 'en')))
+        store.close()
+
+    def test_compact_removes_expired_translations(self):
+        # GIVEN
+        store = TranslationStore(self.path, ttl=60)
+        store.put(('ciao', 'auto', 'en'), 'hello')
+        store.flush()
+        store.connection.execute('UPDATE translations SET created = created - 120')
+        # WHEN
+        removed = store.compact()
+        # THEN
+        self.assertEqual(1, removed)
+        self.assertEqual(0, store.count())
+        store.close()
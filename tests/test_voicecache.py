@@ -0,0 +1,159 @@
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301 USA
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest2
+
+from translator.voicecache import VoiceCache
+
+
+class Test_voicecache(unittest2.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'voices')
+        self.fetched = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def fetch(self, text, lang):
+        self.fetched.append((text, lang))
+        return b'ID3' + text.encode('utf-8') * 10
+
+    def test_digest(self):
+        self.assertEqual(VoiceCache.digest(u'good game', 'en'), VoiceCache.digest(b'good game', u'en'))
+        self.assertNotEqual(VoiceCache.digest('good game', 'en'), VoiceCache.digest('good game', 'it'))
+
+    def test_audio_is_fetched_once(self):
+        # GIVEN
+        cache = VoiceCache(max_bytes=1024)
+        # WHEN
+        first = cache.get('good game', 'en', self.fetch)
+        second = cache.get('good game', 'en', self.fetch)
+        # THEN
+        self.assertIs(first, second)
+        self.assertListEqual([('good game', 'en')], self.fetched)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_least_recently_used_audio_is_evicted(self):
+        # GIVEN
+        cache = VoiceCache(max_bytes=150)
+        cache.get('first', 'en', self.fetch)
+        cache.get('second', 'en', self.fetch)
+        # WHEN
+        cache.get('first', 'en', self.fetch)
+        cache.get('third', 'en', self.fetch)
+        # THEN
+        self.assertTrue(cache.contains('first', 'en'))
+        self.assertFalse(cache.contains('second', 'en'))
+        self.assertEqual(1, cache.evictions)
+        self.assertLessEqual(cache.size, 150)
+
+    def test_disk_tier_survives_restart(self):
+        # GIVEN
+        cache = VoiceCache(max_bytes=1024, path=self.path)
+        audio = cache.get('good game', 'en', self.fetch)
+        # WHEN
+        cache = VoiceCache(max_bytes=1024, path=self.path)
+        # THEN
+        self.assertEqual(audio, cache.get('good game', 'en', self.fetch))
+        self.assertEqual(1, len(self.fetched))
+        self.assertEqual(1, cache.disk_hits)
+
+    def test_disk_tier_is_bounded(self):
+        # GIVEN
+        cache = VoiceCache(max_bytes=0, path=self.path, max_disk_bytes=150)
+        # WHEN
+        for text in ('first', 'second', 'third'):
+            cache.get(text, 'en', self.fetch)
+        # THEN
+        self.assertEqual(2, len(os.listdir(self.path)))
+        self.assertFalse(cache.contains('first', 'en'))
+        self.assertLessEqual(cache.disk_size, 150)
+
+    def test_disk_write_does_not_block_lookups(self):
+        # GIVEN
+        cache = VoiceCache(max_bytes=1024, path=self.path)
+        cache.get('first', 'en', self.fetch)
+        write = cache._write
+        looked_up = []
+
+        def slow_write(digest, audio):
+            thread = threading.Thread(target=lambda: looked_up.append(cache.get('first', 'en', self.fetch)))
+            thread.start()
+            thread.join(5)
+            write(digest, audio)
+
+        cache._write = slow_write
+        # WHEN
+        cache.get('second', 'en', self.fetch)
+        # THEN
+        self.assertEqual(1, len(looked_up))
+        self.assertTrue(cache.contains('second', 'en'))
+
+    def test_disk_eviction_does_not_block_lookups(self):
+        # GIVEN
+        cache = VoiceCache(max_bytes=1024, path=self.path, max_disk_bytes=150)
+        cache.get('first', 'en', self.fetch)
+        remove = os.remove
+        looked_up = []
+
+        def slow_remove(path):
+            thread = threading.Thread(target=lambda: looked_up.append(cache.get('first', 'en', self.fetch)))
+            thread.start()
+            thread.join(5)
+            remove(path)
+
+        os.remove = slow_remove
+        self.addCleanup(setattr, os, 'remove', remove)
+        # WHEN
+        cache.get('second', 'en', self.fetch)
+        cache.get('third', 'en', self.fetch)
+        # THEN
+        self.assertEqual(1, len(looked_up))
+        self.assertEqual(2, len(os.listdir(self.path)))
+
+    def test_concurrent_fetches_are_coalesced(self):
+        # GIVEN
+        cache = VoiceCache(max_bytes=1024)
+        release = threading.Event()
+        results = []
+
+        def slow_fetch(text, lang):
+            release.wait(5)
+            return self.fetch(text, lang)
+
+        threads = [threading.Thread(target=lambda: results.append(cache.get('good game', 'en', slow_fetch)))
+                   for _ in range(4)]
+        # WHEN
+        for thread in threads:
+            thread.start()
+        while cache.flights.shared < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        # THEN
+        self.assertEqual(1, len(self.fetched))
+        self.assertEqual(4, len(results))
+        self.assertTrue(all(x is results[0] for x in results))
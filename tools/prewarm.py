@@ -0,0 +1,196 @@
+# coding: utf-8
+#
+# Translator Plugin for BigBrotherBot(B3) (www.bigbrotherbot.net)
+# Copyright (C) 2013 Daniele Pantaleone <fenix@bigbrotherbot.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+
+
+# Pre-warm the persistent translation cache with the most frequent chat lines of a game log,
+# so that the plugin finds them in its cache_file instead of asking the translation service.
+# B3 is not needed: only the helper modules of the plugin are loaded.
+#
+# USAGE: python tools/prewarm.py games.log --cache-file b3/conf/translator.db --lang en --top 500
+
+import argparse
+import io
+import os
+import re
+import sys
+import time
+import types
+
+PLUGIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'extplugins', 'translator')
+
+if 'translator' not in sys.modules:
+    # register the plugin directory as a bare package, so that its helper
+    # modules are imported without running the plugin __init__ (which needs B3)
+    package = types.ModuleType('translator')
+    package.__path__ = [PLUGIN_DIR]
+    sys.modules['translator'] = package
+
+from translator.backends import BACKENDS
+from translator.backends import create_backend
+from translator.detector import LanguageDetector
+from translator.normalizer import Normalizer
+from translator.prefilter import SkipFilter
+from translator.prefilter import is_chat
+from translator.sanitizer import Sanitizer
+from translator.store import TranslationStore
+
+# say and sayteam lines of the quake 3 engine games (urban terror, openarena, ...):
+#   12:34 say: 2 Player: hello there
+Q3_SAY = re.compile(r'^\s*\d+:\d+\s+say(?:team)?:\s+\d+\s+.*?:\s(?P<text>.*)$')
+# say and sayteam lines of the call of duty games:
+#   12:34 say;GUID;2;Player;hello there
+COD_SAY = re.compile(r'^\s*\d+:\d+\s*say(?:team)?;[^;]*;\d+;[^;]*;(?P<text>.*)$')
+
+FORMATS = (Q3_SAY, COD_SAY)
+
+
+def read_lines(path):
+    """
+    Stream the lines of a file: byte strings on python 2, like the B3 events, and text on python 3.
+    """
+    with io.open(path, 'rb') as f:
+        for line in f:
+            yield line if str is bytes else line.decode('utf-8', 'replace')
+
+
+def chat_messages(lines, min_length=6, prefixes=('!', '@', '&', '/')):
+    """
+    Yield the chat messages found in the given log lines which the plugin would translate.
+    """
+    for line in lines:
+        for pattern in FORMATS:
+            match = pattern.match(line)
+            if match:
+                # call of duty prefixes the messages with a control character
+                message = match.group('text').lstrip('\x15').strip()
+                if is_chat(message, min_length, prefixes):
+                    yield message
+                break
+
+
+def top_phrases(messages, count=500, capacity=None, normalizer=None):
+    """
+    Return the count most frequent messages (as cleaned by the normalizer) with their frequency, most frequent first.
+    At most capacity distinct messages are counted at once (Misra-Gries summary): the memory used doesn't grow
+    with the size of the log, and the frequencies of the less common messages are underestimated.
+    """
+    normalizer = normalizer or Normalizer()
+    capacity = max(count, capacity or count * 20)
+    counters = {}
+    phrases = {}
+    for message in messages:
+        key = normalizer.key(message)
+        if key in counters:
+            counters[key] += 1
+        elif len(counters) < capacity:
+            counters[key] = 1
+            phrases[key] = normalizer.clean(message)
+        else:
+            # no room for a new message: decrement all the counters, dropping the ones reaching zero
+            for other in list(counters):
+                counters[other] -= 1
+                if not counters[other]:
+                    del counters[other]
+                    del phrases[other]
+    ranking = sorted(counters, key=lambda x: (-counters[x], x))[:count]
+    return [(phrases[key], counters[key]) for key in ranking]
+
+
+def prewarm(phrases, backend, store, languages=('en',), from_lang='auto', batch_size=20, delay=1.0,
+            normalizer=None, sanitizer=None, skipfilter=None):
+    """
+    Translate the given phrases into every language and write the translations to the store,
+    using the same keys and format as the plugin. Phrases already stored are not translated again.
+    Return the number of stored translations.
+    """
+    normalizer = normalizer or Normalizer()
+    sanitizer = sanitizer or Sanitizer()
+    skipfilter = skipfilter or SkipFilter(LanguageDetector())
+    stored = 0
+    for to_lang in languages:
+        todo = [text for text in phrases
+                if not skipfilter.check(text, from_lang, to_lang) and
+                store.get((normalizer.key(text), from_lang, to_lang)) is None]
+        for i in range(0, len(todo), batch_size):
+            if i and delay:
+                # don't get banned by the translation service
+                time.sleep(delay)
+            batch = todo[i:i + batch_size]
+            lines = backend.translate_batch(batch, from_lang, to_lang) if len(batch) > 1 else None
+            if lines is not None:
+                translations = [sanitizer('%s: %s' % (text, line.strip())) if line.strip() else None
+                                for text, line in zip(batch, lines)]
+            else:
+                translations = []
+                for text in batch:
+                    translation = backend.translate(text, from_lang, to_lang)
+                    translations.append(sanitizer(translation) if translation else None)
+            for text, translation in zip(batch, translations):
+                if translation:
+                    store.put((normalizer.key(text), from_lang, to_lang), translation)
+                    stored += 1
+    store.flush()
+    return stored
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pre-warm the translator plugin cache file with the most '
+                                                 'frequent chat messages of a game log')
+    parser.add_argument('log', help='the game log file')
+    parser.add_argument('--cache-file', required=True, help='the plugin cache_file')
+    parser.add_argument('--lang', action='append', help='target language code (may be repeated, default: en)')
+    parser.add_argument('--source', default='auto', help='source language code (default: auto)')
+    parser.add_argument('--top', type=int, default=500, help='number of messages to translate (default: 500)')
+    parser.add_argument('--capacity', type=int, help='number of distinct messages counted at once '
+                                                     '(default: 20 times --top)')
+    parser.add_argument('--min-length', type=int, default=6, help='the plugin min_sentence_length (default: 6)')
+    parser.add_argument('--prefixes', default='!@&/', help='the B3 command prefixes (default: !@&/)')
+    parser.add_argument('--game', help='the B3 game name, used to strip its color codes')
+    parser.add_argument('--normalize-rules', default=', '.join(Normalizer.RULES), help='the plugin normalize_rules')
+    parser.add_argument('--backend', default='google', choices=sorted(BACKENDS), help='translation engine')
+    parser.add_argument('--backend-url', help='the plugin backend_url (local backend only)')
+    parser.add_argument('--backend-api-key', help='the plugin backend_api_key (local backend only)')
+    parser.add_argument('--batch-size', type=int, default=20, help='messages translated per request (default: 20)')
+    parser.add_argument('--delay', type=float, default=1.0, help='seconds to wait between requests (default: 1)')
+    parser.add_argument('--dry-run', action='store_true', help='print the ranking without translating')
+    args = parser.parse_args(argv)
+
+    rules = [x.strip() for x in args.normalize_rules.split(',') if x.strip()]
+    normalizer = Normalizer.for_game(args.game, rules)
+    messages = chat_messages(read_lines(args.log), args.min_length, tuple(args.prefixes))
+    phrases = top_phrases(messages, args.top, args.capacity, normalizer)
+    if args.dry_run:
+        for text, frequency in phrases:
+            print('%8d %s' % (frequency, text))
+        return 0
+
+    backend = create_backend(args.backend, url=args.backend_url, api_key=args.backend_api_key)
+    store = TranslationStore(args.cache_file, batch_size=max(1, args.batch_size))
+    try:
+        stored = prewarm([text for text, _ in phrases], backend, store, args.lang or ['en'], args.source,
+                         max(1, args.batch_size), args.delay, normalizer, Sanitizer.for_game(args.game))
+    finally:
+        store.close()
+        backend.close()
+    print('stored %s translations of %s messages in %s' % (stored, len(phrases), args.cache_file))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())